@@ -0,0 +1,18 @@
+-- Category materialized-path migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+
+-- 1. Add the path column
+ALTER TABLE categories ADD COLUMN IF NOT EXISTS path VARCHAR(1000) NOT NULL DEFAULT '';
+
+-- 2. Backfill "/<root id>/.../<own id>/" from parent_id
+WITH RECURSIVE tree AS (
+    SELECT id, '/' || id || '/' AS path
+    FROM categories WHERE parent_id IS NULL
+    UNION ALL
+    SELECT c.id, t.path || c.id || '/'
+    FROM categories c JOIN tree t ON c.parent_id = t.id
+)
+UPDATE categories SET path = tree.path FROM tree WHERE categories.id = tree.id;
+
+-- 3. Prefix index used for descendant-inclusive product filtering
+CREATE INDEX IF NOT EXISTS ix_categories_path ON categories (path varchar_pattern_ops);
@@ -0,0 +1,11 @@
+-- Document number sequences migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- Orders, sales invoices, purchase orders, GRNs and payments are numbered <prefix>-<fiscal year>-<counter>.
+
+-- 1. One counter per series and fiscal year (rows are created on first use)
+CREATE TABLE IF NOT EXISTS document_sequences (
+    series VARCHAR(30) NOT NULL,
+    fiscal_year INTEGER NOT NULL,
+    next_value BIGINT NOT NULL DEFAULT 1,
+    PRIMARY KEY (series, fiscal_year)
+);
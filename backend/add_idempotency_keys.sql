@@ -0,0 +1,22 @@
+-- Idempotency keys migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- POST /api/orders, /api/sales/invoices and /api/payments/ replay their stored response for a repeated Idempotency-Key.
+
+-- 1. One row per (user, key): request fingerprint and the stored response
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    id VARCHAR PRIMARY KEY,
+    user_id VARCHAR NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    fingerprint VARCHAR(64) NOT NULL,
+    status VARCHAR(20) DEFAULT 'in_progress',
+    response_status INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- 2. Duplicates collide (and wait for the first request) on this index
+CREATE UNIQUE INDEX IF NOT EXISTS ux_idempotency_keys_user_key ON idempotency_keys (user_id, key);
+
+-- 3. The purge deletes expired keys off this index
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
@@ -0,0 +1,20 @@
+-- Outbox migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- Order, invoice and payment side effects are queued here and delivered by scripts/outbox_worker.py.
+
+-- 1. One row per event and consumer
+CREATE TABLE IF NOT EXISTS outbox_events (
+    id VARCHAR PRIMARY KEY,
+    topic VARCHAR(50) NOT NULL,
+    consumer VARCHAR(50) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    available_at TIMESTAMP DEFAULT NOW(),
+    created_at TIMESTAMP DEFAULT NOW(),
+    processed_at TIMESTAMP
+);
+
+-- 2. The worker picks due pending rows off this index
+CREATE INDEX IF NOT EXISTS ix_outbox_events_status_available_at ON outbox_events (status, available_at);
@@ -0,0 +1,18 @@
+-- Product change sequence migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- Backs GET /api/products/changes?since=<token> (delta sync for POS terminals and the SPA).
+
+-- 1. Append-only change log; seq is the client's change token
+CREATE TABLE IF NOT EXISTS product_changes (
+    seq BIGSERIAL PRIMARY KEY,
+    product_id VARCHAR NOT NULL,
+    kind VARCHAR(10) NOT NULL,
+    changed_at TIMESTAMP DEFAULT NOW()
+);
+
+-- 2. Seed one change per existing product so a full sync (since=0) sees the whole catalog
+INSERT INTO product_changes (product_id, kind)
+SELECT id, CASE WHEN is_active THEN 'upsert' ELSE 'delete' END
+FROM products
+WHERE NOT EXISTS (SELECT 1 FROM product_changes)
+ORDER BY created_at, id;
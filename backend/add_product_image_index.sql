@@ -0,0 +1,5 @@
+-- Product image lookup index for GET /api/products?view=compact
+-- Run this against your PostgreSQL database before deploying the new code.
+-- CONCURRENTLY avoids locking the catalog; run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_images_product_id ON product_images (product_id);
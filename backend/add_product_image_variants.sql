@@ -0,0 +1,5 @@
+-- Image variants migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- Then run scripts/generate_image_variants.py to render variants for existing uploads.
+
+ALTER TABLE product_images ADD COLUMN IF NOT EXISTS variants TEXT DEFAULT '{}';
@@ -0,0 +1,7 @@
+-- Keyset pagination indexes for GET /api/products?cursor=...
+-- Run this against your PostgreSQL database before deploying the new code.
+-- CONCURRENTLY avoids locking the catalog; run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_created_at_id ON products (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_price_id ON products (price, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_name_id ON products (name, id);
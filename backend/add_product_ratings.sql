@@ -0,0 +1,22 @@
+-- Product rating aggregates migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+
+-- 1. Aggregate columns (approved reviews only)
+ALTER TABLE products ADD COLUMN IF NOT EXISTS rating_avg NUMERIC(3, 2) NOT NULL DEFAULT 0;
+ALTER TABLE products ADD COLUMN IF NOT EXISTS rating_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE products ADD COLUMN IF NOT EXISTS rating_sum INTEGER NOT NULL DEFAULT 0;
+
+-- 2. Backfill from existing approved reviews
+UPDATE products p SET
+    rating_count = r.cnt,
+    rating_sum = r.total,
+    rating_avg = round(r.total::numeric / r.cnt, 2)
+FROM (
+    SELECT product_id, count(*) AS cnt, sum(rating) AS total
+    FROM reviews WHERE is_approved
+    GROUP BY product_id
+) r
+WHERE p.id = r.product_id;
+
+-- 3. Index for GET /api/products?sort=rating
+CREATE INDEX IF NOT EXISTS ix_products_rating_avg_id ON products (rating_avg, id);
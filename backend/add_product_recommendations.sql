@@ -0,0 +1,16 @@
+-- "Frequently bought together" migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code,
+-- then populate it with scripts/build_recommendations.py (schedule it nightly).
+
+CREATE TABLE IF NOT EXISTS product_recommendations (
+    id VARCHAR PRIMARY KEY,
+    product_id VARCHAR NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    recommended_product_id VARCHAR NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    score DOUBLE PRECISION NOT NULL,
+    lift DOUBLE PRECISION NOT NULL,
+    co_count INTEGER NOT NULL,
+    computed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_product_recommendations_product_rank ON product_recommendations (product_id, rank);
@@ -0,0 +1,19 @@
+-- Full-text search migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- Weights must match SEARCH_WEIGHTS in app/utils/search.py.
+
+-- 1. Add the weighted search document column
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- 2. Backfill existing products
+UPDATE products SET search_vector =
+    setweight(to_tsvector('english', replace(coalesce(name, ''), ',', ' ')), 'A') ||
+    setweight(to_tsvector('english', replace(coalesce(sku, ''), ',', ' ')), 'A') ||
+    setweight(to_tsvector('english', replace(coalesce(tags, ''), ',', ' ')), 'B') ||
+    setweight(to_tsvector('english', replace(coalesce(description, ''), ',', ' ')), 'C');
+
+-- 3. GIN index used by GET /api/products?search=...
+CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING gin (search_vector);
+
+-- 4. SKU prefix index for the "sku LIKE 'PREFIX%'" leg of the same search
+CREATE INDEX IF NOT EXISTS ix_products_sku_prefix ON products (sku varchar_pattern_ops);
@@ -0,0 +1,10 @@
+-- Typo-tolerant product search migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- CONCURRENTLY avoids locking the catalog; run outside a transaction block.
+
+-- 1. Trigram operators and index support
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 2. GIN trigram indexes used by GET /api/products?search=...&fuzzy=true
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_sku_trgm ON products USING gin (sku gin_trgm_ops);
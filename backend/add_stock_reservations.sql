@@ -0,0 +1,24 @@
+-- Stock reservations migration for Senapati Hardware
+-- Run this against your PostgreSQL database before deploying the new code.
+-- Cart lines hold stock for RESERVATION_TTL_SECONDS; available stock is stock - reserved.
+
+-- 1. Units currently held by cart reservations
+ALTER TABLE products ADD COLUMN IF NOT EXISTS reserved INTEGER NOT NULL DEFAULT 0;
+
+-- 2. One hold per cart line
+CREATE TABLE IF NOT EXISTS stock_reservations (
+    id VARCHAR PRIMARY KEY,
+    cart_item_id VARCHAR NOT NULL UNIQUE REFERENCES cart_items(id),
+    product_id VARCHAR NOT NULL REFERENCES products(id),
+    quantity INTEGER NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- 3. The expiry sweep reads lapsed holds off this index
+CREATE INDEX IF NOT EXISTS ix_stock_reservations_expires_at ON stock_reservations (expires_at);
+
+-- 4. No ON DELETE CASCADE: cart lines release their hold (and products.reserved) through the app.
+--    Recreates the constraint on databases that ran an earlier version of this migration.
+ALTER TABLE stock_reservations DROP CONSTRAINT IF EXISTS stock_reservations_cart_item_id_fkey;
+ALTER TABLE stock_reservations ADD CONSTRAINT stock_reservations_cart_item_id_fkey
+    FOREIGN KEY (cart_item_id) REFERENCES cart_items(id);
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +11,36 @@ class Settings:
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", "2"))  # processes rendering image variants
+    IMAGE_CACHE_DIR: str = os.getenv("IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "senapati-image-cache"))  # ?w= resizes
+    IMAGE_CACHE_MAX_BYTES: int = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # per API worker process
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")  # memory, redis or none
+    CACHE_URL: str = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+    FUZZY_SEARCH_THRESHOLD: float = float(os.getenv("FUZZY_SEARCH_THRESHOLD", "0.5"))
+    COUNT_EXACT_LIMIT: int = int(os.getenv("COUNT_EXACT_LIMIT", "10000"))  # planner estimate up to which totals are exact
+    COUNT_LARGE_STRATEGY: str = os.getenv("COUNT_LARGE_STRATEGY", "cached")  # cached, estimate or exact
+    COUNT_CACHE_TTL_SECONDS: int = int(os.getenv("COUNT_CACHE_TTL_SECONDS", "60"))
+    RESERVATION_TTL_SECONDS: int = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))  # cart line stock holds
+    RESERVATION_SWEEP_SECONDS: int = int(os.getenv("RESERVATION_SWEEP_SECONDS", "30"))
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))  # how long Idempotency-Key replays last
+    IDEMPOTENCY_WAIT_SECONDS: int = int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    DOCUMENT_NUMBER_PREFIXES: dict = dict(
+        item.split("=", 1) for item in os.getenv(
+            "DOCUMENT_NUMBER_PREFIXES", "order=SH,sales_invoice=INV,purchase_order=PO,grn=GRN,payment=PAY"
+        ).split(",")
+    )
+    DOCUMENT_NUMBER_BLOCK_SIZE: int = int(os.getenv("DOCUMENT_NUMBER_BLOCK_SIZE", "50"))  # numbers reserved per worker at a time
+    FISCAL_YEAR_START_MONTH: int = int(os.getenv("FISCAL_YEAR_START_MONTH", "4"))  # document numbers restart each fiscal year
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))  # events per worker transaction
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BACKOFF_SECONDS: int = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "5"))  # first retry delay, doubled per attempt
+    OUTBOX_BACKOFF_MAX_SECONDS: int = int(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+    OUTBOX_RETENTION_DAYS: int = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+    SUGGEST_REBUILD_SECONDS: int = int(os.getenv("SUGGEST_REBUILD_SECONDS", "600"))
+    SITE_URL: str = os.getenv("SITE_URL", "http://localhost:5173")  # public storefront, for feed and sitemap links
     CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:5174").split(",")
 
 
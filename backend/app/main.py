@@ -1,9 +1,14 @@
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
+from app.utils.cache import register_cache_invalidation
+from app.utils.suggest import register_suggest_index
+from app.utils.change_log import register_change_log
+from app.utils.reservations import start_reservation_sweeper
+from app.utils.idempotency import start_idempotency_purger
+from app.utils.image_cache import ResizingStaticFiles
 
 # Import all models to register them
 from app.models.models import *
@@ -11,13 +16,18 @@ from app.models.models import *
 # Import routes
 from app.routes import (
     auth, products, categories, cart, orders, coupons, reviews, wishlist, 
-    addresses, banners, admin, upload,
+    addresses, banners, admin, upload, feeds,
     suppliers, b2b_customers, warehouses, purchases, sales, payments
 )
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+# Session hooks that keep the response cache, search suggestions and change log in step with committed writes
+register_cache_invalidation(SessionLocal)
+register_suggest_index(SessionLocal)
+register_change_log(SessionLocal)
+
 app = FastAPI(
     title="Senapati Hardware API",
     description="Full-scale E-Commerce API for Senapati Hardware Store",
@@ -34,6 +44,8 @@ async def startup_event():
         # We can't easily exit here without crashing the worker, 
         # but we can log a severe error or potentially raise an exception to stop startup.
         raise RuntimeError("CRITICAL SECURITY RISK: SECRET_KEY is default 'change-me'. Update .env file immediately.")
+    start_reservation_sweeper(SessionLocal)
+    start_idempotency_purger(SessionLocal)
 
 # CORS
 app.add_middleware(
@@ -42,11 +54,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Exact", "Idempotent-Replayed"],
 )
 
-# Static files for uploads
+# Static files for uploads (?w=<width> serves a resized copy)
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+app.mount("/uploads", ResizingStaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Register routers
 app.include_router(auth.router)
@@ -61,6 +74,7 @@ app.include_router(addresses.router)
 app.include_router(banners.router)
 app.include_router(admin.router)
 app.include_router(upload.router)
+app.include_router(feeds.router)
 
 # Inventory Management Routes
 app.include_router(suppliers.router)
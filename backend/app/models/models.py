@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime, timezone
 from sqlalchemy import (
-    Column, String, Float, Integer, Boolean, Text, DateTime, Date,
-    ForeignKey, Enum as SAEnum, Numeric, Table
+    Column, String, Float, Integer, BigInteger, Boolean, Text, DateTime, Date,
+    ForeignKey, Enum as SAEnum, Numeric, Table, Index, DDL, event
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -343,10 +344,17 @@ class Category(Base):
     description = Column(Text, default="")
     image_url = Column(String(500), default="")
     parent_id = Column(String, ForeignKey("categories.id"), nullable=True)
+    # Materialized ancestor path "/<root id>/.../<own id>/", maintained by app.utils.category_tree
+    path = Column(String(1000), nullable=False, default="")
     is_active = Column(Boolean, default=True)
     sort_order = Column(Integer, default=0)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        # varchar_pattern_ops lets PostgreSQL answer "path LIKE 'prefix%'" from the index
+        Index("ix_categories_path", "path", postgresql_ops={"path": "varchar_pattern_ops"}),
+    )
+
     parent = relationship("Category", remote_side=[id], backref="subcategories")
     products = relationship("Product", back_populates="category")
 
@@ -367,6 +375,8 @@ class Product(Base):
     category_id = Column(String, ForeignKey("categories.id"), nullable=True)
     brand = Column(String(200), default="")
     stock = Column(Integer, default=0)
+    # Units held by live cart reservations (app.utils.reservations); available = stock - reserved
+    reserved = Column(Integer, default=0, nullable=False)
     low_stock_threshold = Column(Integer, default=5)
     hsn_code = Column(String(20), default="")
     weight = Column(Float, nullable=True)
@@ -376,15 +386,42 @@ class Product(Base):
     tags = Column(String(1000), default="")
     meta_title = Column(String(300), default="")
     meta_description = Column(String(500), default="")
+    # Approved-review aggregates, maintained by app.utils.ratings
+    rating_avg = Column(Numeric(3, 2), default=0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
+    rating_sum = Column(Integer, default=0, nullable=False)
+    # Weighted full-text document (name/sku > tags > description), kept in sync by app.utils.search
+    search_vector = Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # varchar_pattern_ops lets PostgreSQL answer the search's "sku LIKE 'PREFIX%'" from the index
+        Index("ix_products_sku_prefix", "sku", postgresql_ops={"sku": "varchar_pattern_ops"}),
+        # Keyset pagination: one (sort key, id) index per listing sort
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_rating_avg_id", "rating_avg", "id"),
+        # Typo-tolerant search (pg_trgm word similarity on name and SKU)
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_products_sku_trgm", "sku", postgresql_using="gin", postgresql_ops={"sku": "gin_trgm_ops"}),
+    )
+
     category = relationship("Category", back_populates="products")
     images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
     reviews = relationship("Review", back_populates="product", cascade="all, delete-orphan")
     order_items = relationship("OrderItem", back_populates="product")
 
 
+# The trigram indexes need pg_trgm; install it before the products table is created
+event.listen(
+    Product.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
 # ─── PRODUCT IMAGE ──────────────────────────────────────
 class ProductImage(Base):
     __tablename__ = "product_images"
@@ -395,10 +432,48 @@ class ProductImage(Base):
     alt_text = Column(String(300), default="")
     sort_order = Column(Integer, default=0)
     is_primary = Column(Boolean, default=False)
+    # JSON: {"thumb": {"width": .., "height": .., "webp": url, "jpeg": url}, "medium": .., "large": ..}
+    variants = Column(Text, default="{}")
+
+    __table_args__ = (
+        # Postgres does not index foreign keys; compact listings look up each product's primary image
+        Index("ix_product_images_product_id", "product_id"),
+    )
 
     product = relationship("Product", back_populates="images")
 
 
+# ─── PRODUCT CHANGE ─────────────────────────────────────
+class ProductChange(Base):
+    """Append-only change sequence behind GET /api/products/changes (see app.utils.change_log)."""
+    __tablename__ = "product_changes"
+
+    # Monotonic change token; BigInteger on PostgreSQL, INTEGER (rowid alias) elsewhere
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    product_id = Column(String, nullable=False)  # no FK: tombstones outlive the product
+    kind = Column(String(10), nullable=False)  # upsert or delete
+    changed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+# ─── PRODUCT RECOMMENDATION ─────────────────────────────
+class ProductRecommendation(Base):
+    """Top-K "frequently bought together" neighbours, rebuilt offline by app.utils.recommendations."""
+    __tablename__ = "product_recommendations"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    product_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    recommended_product_id = Column(String, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    rank = Column(Integer, nullable=False)  # 1 = strongest
+    score = Column(Float, nullable=False)  # cosine similarity of the two products' basket vectors
+    lift = Column(Float, nullable=False)
+    co_count = Column(Integer, nullable=False)  # baskets containing both
+    computed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_product_recommendations_product_rank", "product_id", "rank"),
+    )
+
+
 # ─── CART ────────────────────────────────────────────────
 class Cart(Base):
     __tablename__ = "carts"
@@ -424,6 +499,18 @@ class CartItem(Base):
     product = relationship("Product")
 
 
+class StockReservation(Base):
+    """Short-lived hold on stock for one cart line; expired by app.utils.reservations.expire_reservations."""
+    __tablename__ = "stock_reservations"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    # No ON DELETE CASCADE: a hold must be released through app.utils.reservations so products.reserved drops too
+    cart_item_id = Column(String, ForeignKey("cart_items.id"), nullable=False, unique=True)
+    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
 # ─── ORDER ──────────────────────────────────────────────
 class Order(Base):
     __tablename__ = "orders"
@@ -1087,3 +1174,54 @@ class SerialNumber(Base):
     batch = relationship("Batch")
     grn = relationship("GoodsReceivedNote")
     sales_invoice = relationship("SalesInvoice")
+
+
+# ─── IDEMPOTENCY KEY ────────────────────────────────────
+class IdempotencyKey(Base):
+    """Stored outcome of a POST sent with an Idempotency-Key header (see app.utils.idempotency)."""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path and request body
+    status = Column(String(20), default="in_progress")  # in_progress, completed
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ux_idempotency_keys_user_key", "user_id", "key", unique=True),
+    )
+
+
+# ─── DOCUMENT SEQUENCE ──────────────────────────────────
+class DocumentSequence(Base):
+    """Next counter value of a document number series in one fiscal year (see app.utils.numbering)."""
+    __tablename__ = "document_sequences"
+
+    series = Column(String(30), primary_key=True)  # order, sales_invoice, purchase_order, grn, payment
+    fiscal_year = Column(Integer, primary_key=True)  # calendar year the fiscal year starts in
+    next_value = Column(BigInteger, nullable=False, default=1)
+
+
+# ─── OUTBOX EVENT ───────────────────────────────────────
+class OutboxEvent(Base):
+    """Side effect queued in the same transaction as its cause, one row per consumer (see app.utils.outbox)."""
+    __tablename__ = "outbox_events"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    topic = Column(String(50), nullable=False)  # order.placed, order.status_changed, sales_invoice.created, payment.created
+    consumer = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), default="pending")  # pending, done, failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))  # next delivery attempt
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_events_status_available_at", "status", "available_at"),
+    )
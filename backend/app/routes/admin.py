@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from datetime import datetime, timedelta, timezone
@@ -15,6 +15,8 @@ from app.schemas.schemas import (
     InventoryTransactionCreate, PermissionTemplateResponse
 )
 from app.utils.auth import require_admin, require_staff_or_admin, require_permission, hash_password
+from app.utils.cache import catalog_cache
+from app.utils.counting import count_total
 from typing import List
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
@@ -66,6 +68,7 @@ def get_dashboard(user=Depends(require_permission("dashboard:view")), db: Sessio
 # ─── CUSTOMER MANAGEMENT ────────────────────────────────
 @router.get("/customers", response_model=List[UserResponse])
 def list_customers(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     search: str = Query(None),
@@ -75,6 +78,10 @@ def list_customers(
     q = db.query(User).filter(User.role == UserRole.CUSTOMER)
     if search:
         q = q.filter(User.email.ilike(f"%{search}%") | User.first_name.ilike(f"%{search}%"))
+    # The body stays a plain list; the total travels in headers
+    total, total_exact = count_total(db, q)
+    response.headers["X-Total-Count"] = str(total)
+    response.headers["X-Total-Exact"] = "true" if total_exact else "false"
     return q.order_by(User.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
 
 
@@ -409,6 +416,19 @@ def update_settings(reqs: List[StoreSettingUpdate], user=Depends(require_permiss
     return {"message": "Settings updated"}
 
 
+# ─── CATALOG CACHE ──────────────────────────────────────
+@router.get("/cache/stats")
+def get_cache_stats(user=Depends(require_permission("settings:view"))):
+    """Hit/miss/invalidation counters for the catalog response cache (per process)."""
+    return catalog_cache.stats()
+
+
+@router.post("/cache/clear")
+def clear_cache(user=Depends(require_permission("settings:manage"))):
+    catalog_cache.clear()
+    return {"message": "Cache cleared"}
+
+
 # ─── REPORTS ────────────────────────────────────────────
 @router.get("/reports/sales")
 def sales_report(
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.models import Banner
 from app.schemas.schemas import BannerCreate, BannerResponse
 from app.utils.auth import require_permission
+from app.utils.cache import cached_response, BANNERS
 from typing import List
 
 router = APIRouter(prefix="/api/banners", tags=["Banners"])
 
 
 @router.get("", response_model=List[BannerResponse])
-def list_active_banners(db: Session = Depends(get_db)):
-    return db.query(Banner).filter(Banner.is_active == True).order_by(Banner.sort_order).all()
+def list_active_banners(request: Request, db: Session = Depends(get_db)):
+    def build():
+        banners = db.query(Banner).filter(Banner.is_active == True).order_by(Banner.sort_order).all()
+        return [BannerResponse.model_validate(b) for b in banners]
+    return cached_response(BANNERS, {"active": True}, build, request)
 
 
 @router.get("/all", response_model=List[BannerResponse])
@@ -4,6 +4,7 @@ from app.database import get_db
 from app.models.models import Cart, CartItem, Product
 from app.schemas.schemas import CartItemAdd, CartResponse
 from app.utils.auth import get_current_user
+from app.utils.reservations import hold_line, release_lines
 from app.models.models import User
 
 router = APIRouter(prefix="/api/cart", tags=["Cart"])
@@ -33,17 +34,22 @@ def add_to_cart(req: CartItemAdd, user: User = Depends(get_current_user), db: Se
     product = db.query(Product).filter(Product.id == req.product_id, Product.is_active == True).first()
     if not product:
         raise HTTPException(404, "Product not found")
-    if product.stock < req.quantity:
-        raise HTTPException(400, "Insufficient stock")
 
     cart = _get_or_create_cart(user, db)
     item = db.query(CartItem).filter(CartItem.cart_id == cart.id, CartItem.product_id == req.product_id).first()
 
     if item:
-        item.quantity += req.quantity
+        quantity = item.quantity + req.quantity
     else:
-        item = CartItem(cart_id=cart.id, product_id=req.product_id, quantity=req.quantity)
+        quantity = req.quantity
+        item = CartItem(cart_id=cart.id, product_id=req.product_id, quantity=0)
         db.add(item)
+        db.flush()
+    # Hold the whole line for the reservation TTL; fails if other carts hold the rest
+    if not hold_line(db, item, quantity):
+        db.rollback()
+        raise HTTPException(400, "Insufficient stock")
+    item.quantity = quantity
 
     db.commit()
     return {"message": "Item added to cart"}
@@ -57,8 +63,11 @@ def update_cart_item(item_id: str, quantity: int, user: User = Depends(get_curre
         raise HTTPException(404, "Cart item not found")
 
     if quantity <= 0:
-        db.delete(item)
+        db.delete(item)  # releases the hold (see app.utils.reservations)
     else:
+        if not hold_line(db, item, quantity):
+            db.rollback()
+            raise HTTPException(400, "Insufficient stock")
         item.quantity = quantity
     db.commit()
     return {"message": "Cart updated"}
@@ -70,7 +79,7 @@ def remove_cart_item(item_id: str, user: User = Depends(get_current_user), db: S
     item = db.query(CartItem).filter(CartItem.id == item_id, CartItem.cart_id == cart.id).first()
     if not item:
         raise HTTPException(404, "Cart item not found")
-    db.delete(item)
+    db.delete(item)  # releases the hold (see app.utils.reservations)
     db.commit()
     return {"message": "Item removed"}
 
@@ -78,6 +87,7 @@ def remove_cart_item(item_id: str, user: User = Depends(get_current_user), db: S
 @router.delete("")
 def clear_cart(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     cart = _get_or_create_cart(user, db)
+    release_lines(db, [item_id for (item_id,) in db.query(CartItem.id).filter(CartItem.cart_id == cart.id)])
     db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
     db.commit()
     return {"message": "Cart cleared"}
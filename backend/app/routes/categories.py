@@ -1,36 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.models import Category
+from app.models.models import Category, Product
 from app.schemas.schemas import CategoryCreate, CategoryResponse
 from app.utils.auth import require_permission
+from app.utils.cache import cached_response, CATEGORIES
+from app.utils.category_tree import assign_path, move_category
 from typing import List
 
 router = APIRouter(prefix="/api/categories", tags=["Categories"])
 
 
-@router.get("", response_model=List[CategoryResponse])
-def list_categories(db: Session = Depends(get_db)):
-    from app.models.models import Product
-    categories = db.query(Category).filter(Category.is_active == True).order_by(Category.sort_order).all()
+def _product_counts(db: Session, categories: List[Category]) -> dict:
+    """Product counts per category id, rolled up so a parent includes all descendants.
+
+    One grouped COUNT over products replaces a COUNT per category; the roll-up walks
+    the (small) category tree in memory.
+    """
+    direct = dict(
+        db.query(Product.category_id, func.count(Product.id))
+        .filter(Product.category_id.isnot(None))
+        .group_by(Product.category_id).all()
+    )
+    parent_of = dict(db.query(Category.id, Category.parent_id).all())
+
+    totals = dict.fromkeys(parent_of, 0)
+    for cat_id, count in direct.items():
+        seen = set()
+        node = cat_id
+        # Credit the category and each ancestor once; `seen` guards against parent cycles
+        while node is not None and node in totals and node not in seen:
+            seen.add(node)
+            totals[node] += count
+            node = parent_of.get(node)
+    return {cat.id: (direct.get(cat.id, 0), totals.get(cat.id, 0)) for cat in categories}
+
+
+def _with_counts(db: Session, categories: List[Category]) -> List[dict]:
+    counts = _product_counts(db, categories)
     result = []
     for cat in categories:
         cat_dict = CategoryResponse.from_orm(cat).model_dump()
-        cat_dict['product_count'] = db.query(Product).filter(Product.category_id == cat.id).count()
+        cat_dict['direct_product_count'], cat_dict['product_count'] = counts[cat.id]
         result.append(cat_dict)
     return result
 
 
+@router.get("", response_model=List[CategoryResponse])
+def list_categories(request: Request, db: Session = Depends(get_db)):
+    def build():
+        categories = db.query(Category).filter(Category.is_active == True).order_by(Category.sort_order).all()
+        return _with_counts(db, categories)
+    return cached_response(CATEGORIES, {"active": True}, build, request)
+
+
 @router.get("/all", response_model=List[CategoryResponse])
 def list_all_categories(admin=Depends(require_permission("catalog:view")), db: Session = Depends(get_db)):
-    from app.models.models import Product
     categories = db.query(Category).order_by(Category.sort_order).all()
-    result = []
-    for cat in categories:
-        cat_dict = CategoryResponse.from_orm(cat).model_dump()
-        cat_dict['product_count'] = db.query(Product).filter(Product.category_id == cat.id).count()
-        result.append(cat_dict)
-    return result
+    return _with_counts(db, categories)
 
 
 @router.get("/{slug}", response_model=CategoryResponse)
@@ -46,6 +74,7 @@ def create_category(req: CategoryCreate, admin=Depends(require_permission("catal
     if db.query(Category).filter(Category.slug == req.slug).first():
         raise HTTPException(400, "Slug already exists")
     cat = Category(**req.model_dump())
+    assign_path(db, cat)
     db.add(cat)
     db.commit()
     db.refresh(cat)
@@ -57,7 +86,10 @@ def update_category(category_id: str, req: CategoryCreate, admin=Depends(require
     cat = db.query(Category).filter(Category.id == category_id).first()
     if not cat:
         raise HTTPException(404, "Category not found")
-    for field, value in req.model_dump(exclude_unset=True).items():
+    updates = req.model_dump(exclude_unset=True)
+    if "parent_id" in updates:
+        move_category(db, cat, updates.pop("parent_id"))
+    for field, value in updates.items():
         setattr(cat, field, value)
     db.commit()
     db.refresh(cat)
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.utils.catalog_feed import (
+    stream_feed_csv, stream_feed_xml, sitemap_plan, sitemap_file_starts, stream_sitemap,
+    stream_sitemap_index, sitemap_pages, stream_sitemap_products
+)
+from app.models.models import Product
+
+router = APIRouter(tags=["Feeds"])
+
+XML = "application/xml; charset=utf-8"
+
+
+@router.get("/api/feeds/products.csv")
+def product_feed_csv():
+    """Every active product as a merchant-feed CSV, streamed from a server-side cursor."""
+    return StreamingResponse(
+        stream_feed_csv(), media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="products.csv"'}
+    )
+
+
+@router.get("/api/feeds/products.xml")
+def product_feed_xml():
+    """Every active product as a Google Merchant RSS feed, streamed from a server-side cursor."""
+    return StreamingResponse(stream_feed_xml(), media_type=XML)
+
+
+@router.get("/sitemap.xml", include_in_schema=False)
+def sitemap(db: Session = Depends(get_db)):
+    is_index, _ = sitemap_plan(db)
+    if is_index:
+        return StreamingResponse(stream_sitemap_index(sitemap_file_starts(db)), media_type=XML)
+    return StreamingResponse(stream_sitemap(db), media_type=XML)
+
+
+@router.get("/sitemap-pages.xml", include_in_schema=False)
+def sitemap_store_pages(db: Session = Depends(get_db)):
+    return Response(sitemap_pages(db), media_type=XML)
+
+
+@router.get("/sitemap-products-{start}.xml", include_in_schema=False)
+def sitemap_products(start: str, db: Session = Depends(get_db)):
+    is_index, _ = sitemap_plan(db)
+    product = db.get(Product, start)
+    if not is_index or product is None or not product.is_active:
+        raise HTTPException(404, "Sitemap not found")
+    return StreamingResponse(stream_sitemap_products(start), media_type=XML)
@@ -1,28 +1,38 @@
 import math
-import random
-import string
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.models.models import (
     Order, OrderItem, Cart, CartItem, Product, Address, Coupon, User, UserRole,
-    OrderStatus, PaymentStatus, PaymentMethod, DiscountType, InventoryLog
+    OrderStatus, PaymentStatus, PaymentMethod, DiscountType
 )
 from app.schemas.schemas import (
     OrderCreate, OrderResponse, OrderStatusUpdate, OrderListResponse
 )
 from app.utils.auth import get_current_user, require_permission
+from app.utils.cache import invalidate_products, queue_product_invalidation
+from app.utils.change_log import record_product_changes
+from app.utils.counting import count_total
+from app.utils.idempotency import idempotent
+from app.utils.etag import make_etag, etag_matches, not_modified, tag_response
+from app.utils.numbering import next_number
+from app.utils.outbox import publish
+from app.utils.stock import take_stock, restore_stock, log_stock_movements
+from app.utils.reservations import consume_lines, held_by_lines
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
 
-def _gen_order_number():
-    return "SH-" + "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
+@router.post("", response_model=OrderResponse)
+def create_order(
+    req: OrderCreate, request: Request, user: User = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    return idempotent(request, db, user.id, req, OrderResponse, lambda: _create_order(req, user, db))
 
 
-@router.post("", response_model=OrderResponse)
-def create_order(req: OrderCreate, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def _create_order(req: OrderCreate, user: User, db: Session):
     cart = db.query(Cart).options(
         joinedload(Cart.items).joinedload(CartItem.product)
     ).filter(Cart.user_id == user.id).first()
@@ -45,12 +55,16 @@ def create_order(req: OrderCreate, user: User = Depends(get_current_user), db: S
     if not req.shipping_name:
         raise HTTPException(400, "Shipping address is required")
 
-    # Calculate totals
+    # Calculate totals. The stock check here only fails fast; take_stock below is authoritative.
     subtotal = 0
     order_items = []
+    quantities = {}
+    held = held_by_lines(db, [ci.id for ci in cart.items])
     for ci in cart.items:
-        if ci.product.stock < ci.quantity:
+        # Units held by other carts are taken; this cart's own holds are not
+        if ci.product.stock - ci.product.reserved + held.get(ci.id, 0) < ci.quantity:
             raise HTTPException(400, f"Insufficient stock for {ci.product.name}")
+        quantities[ci.product.id] = quantities.get(ci.product.id, 0) + ci.quantity
         item_total = float(ci.product.price) * ci.quantity
         subtotal += item_total
         order_items.append(OrderItem(
@@ -84,7 +98,7 @@ def create_order(req: OrderCreate, user: User = Depends(get_current_user), db: S
     total = round(subtotal - discount + shipping + tax, 2)
 
     order = Order(
-        order_number=_gen_order_number(),
+        order_number=next_number(db, "order"),
         user_id=user.id,
         status=OrderStatus.PENDING,
         payment_status=PaymentStatus.PENDING,
@@ -106,20 +120,26 @@ def create_order(req: OrderCreate, user: User = Depends(get_current_user), db: S
         items=order_items
     )
     db.add(order)
+    db.flush()
+    log_stock_movements(db, quantities, -1, f"Order {order.order_number}", user.id)
 
-    # Deduct stock
-    for ci in cart.items:
-        ci.product.stock -= ci.quantity
-        db.add(InventoryLog(
-            product_id=ci.product.id,
-            change=-ci.quantity,
-            reason=f"Order {order.order_number}",
-            performed_by=user.id
-        ))
-
-    # Clear cart
+    # Clear cart, turning its reservations into the stock taken below
+    held = consume_lines(db, [ci.id for ci in cart.items])
     db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    db.commit()
+
+    # Deduct stock last so the product row locks are held only until the commit below
+    short = take_stock(db, quantities, held)
+    if short:
+        names = {ci.product.id: ci.product.name for ci in cart.items}
+        db.rollback()
+        raise HTTPException(400, f"Insufficient stock for {', '.join(names[i] for i in short)}")
+    record_product_changes(db, quantities)
+    publish(db, "order.placed", {
+        "order_id": order.id, "order_number": order.order_number, "user_id": user.id,
+        "email": user.email, "phone": order.shipping_phone, "total": total
+    })
+    queue_product_invalidation(db, {ci.product.slug for ci in cart.items})
+    db.flush()
     db.refresh(order)
     return OrderResponse.model_validate(order)
 
@@ -132,9 +152,12 @@ def my_orders(
     db: Session = Depends(get_db)
 ):
     q = db.query(Order).options(joinedload(Order.items)).filter(Order.user_id == user.id)
-    total = q.count()
+    total, total_exact = count_total(db, q)
     orders = q.order_by(Order.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return OrderListResponse(orders=[OrderResponse.model_validate(o) for o in orders], total=total, page=page, page_size=page_size)
+    return OrderListResponse(
+        orders=[OrderResponse.model_validate(o) for o in orders],
+        total=total, total_exact=total_exact, page=page, page_size=page_size
+    )
 
 
 @router.get("/all", response_model=OrderListResponse)
@@ -148,18 +171,28 @@ def all_orders(
     q = db.query(Order).options(joinedload(Order.items))
     if status:
         q = q.filter(Order.status == status)
-    total = q.count()
+    total, total_exact = count_total(db, q)
     orders = q.order_by(Order.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return OrderListResponse(orders=[OrderResponse.model_validate(o) for o in orders], total=total, page=page, page_size=page_size)
+    return OrderListResponse(
+        orders=[OrderResponse.model_validate(o) for o in orders],
+        total=total, total_exact=total_exact, page=page, page_size=page_size
+    )
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(order_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    order = db.query(Order).options(joinedload(Order.items)).filter(Order.id == order_id).first()
-    if not order:
+def get_order(order_id: str, request: Request, response: Response, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Check access and the version first; the items are only loaded when the client's copy is stale
+    head = db.query(Order.user_id, Order.updated_at).filter(Order.id == order_id).first()
+    if not head:
         raise HTTPException(404, "Order not found")
-    if user.role == UserRole.CUSTOMER and order.user_id != user.id:
+    if user.role == UserRole.CUSTOMER and head.user_id != user.id:
         raise HTTPException(403, "Access denied")
+    etag = make_etag("order", order_id, head.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    order = db.query(Order).options(joinedload(Order.items)).filter(Order.id == order_id).first()
+    tag_response(response, make_etag("order", order_id, order.updated_at))
     return OrderResponse.model_validate(order)
 
 
@@ -179,6 +212,11 @@ def update_order_status(
         order.delivered_at = datetime.now(timezone.utc)
         order.payment_status = PaymentStatus.PAID
 
+    publish(db, "order.status_changed", {
+        "order_id": order.id, "order_number": order.order_number, "user_id": order.user_id,
+        "email": order.user.email if order.user else None, "phone": order.shipping_phone,
+        "status": req.status, "tracking_number": order.tracking_number
+    })
     db.commit()
     db.refresh(order)
     return OrderResponse.model_validate(order)
@@ -195,16 +233,17 @@ def cancel_order(order_id: str, user: User = Depends(get_current_user), db: Sess
         raise HTTPException(400, "Cannot cancel this order")
 
     order.status = OrderStatus.CANCELLED
-    # Restore stock
+    # Restore stock in place (stock + qty) so concurrent checkouts are not overwritten
+    quantities = {}
     for item in order.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            product.stock += item.quantity
-            db.add(InventoryLog(
-                product_id=product.id,
-                change=item.quantity,
-                reason=f"Order {order.order_number} cancelled",
-                performed_by=user.id
-            ))
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    existing = dict(db.execute(select(Product.id, Product.slug).where(Product.id.in_(quantities))).all())
+    quantities = {product_id: qty for product_id, qty in quantities.items() if product_id in existing}
+    slugs = set(existing.values())
+    db.flush()
+    restore_stock(db, quantities)
+    log_stock_movements(db, quantities, 1, f"Order {order.order_number} cancelled", user.id)
+    record_product_changes(db, quantities)
     db.commit()
+    invalidate_products(slugs)
     return {"message": "Order cancelled"}
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 from app.database import get_db
 from app.models.models import Payment, PurchaseInvoice, SalesInvoice, Supplier, B2BCustomer
 from app.schemas.schemas import PaymentCreate, PaymentResponse
 from app.utils.auth import require_permission
+from app.utils.idempotency import idempotent
+from app.utils.numbering import next_number
+from app.utils.outbox import publish
 
 router = APIRouter(prefix="/api/payments", tags=["Payments"])
 
@@ -12,10 +15,20 @@ router = APIRouter(prefix="/api/payments", tags=["Payments"])
 @router.post("/", response_model=PaymentResponse)
 def create_payment(
     payment: PaymentCreate,
+    request: Request,
     db: Session = Depends(get_db),
     current_user=Depends(require_permission("payments:manage"))
 ):
-    """Create a new payment record. Requires payments:manage permission."""
+    """Create a new payment record. Requires payments:manage permission. Retries may send an Idempotency-Key header."""
+    return idempotent(
+        request, db, current_user.id, payment, PaymentResponse, lambda: _create_payment(payment, db, current_user)
+    )
+
+
+def _create_payment(payment: PaymentCreate, db: Session, current_user):
+    if not payment.payment_number:
+        payment.payment_number = next_number(db, "payment", payment.payment_date)
+
     # Check if payment number exists
     existing = db.query(Payment).filter(Payment.payment_number == payment.payment_number).first()
     if existing:
@@ -78,7 +91,12 @@ def create_payment(
                 if customer:
                     customer.current_balance = B2BCustomer.current_balance - amount
 
-    db.commit()
+    db.flush()
+    publish(db, "payment.created", {
+        "payment_id": db_payment.id, "payment_number": db_payment.payment_number,
+        "payment_type": payment.payment_type, "amount": payment.amount, "payment_date": payment.payment_date,
+        "sales_invoice_id": payment.sales_invoice_id, "purchase_invoice_id": payment.purchase_invoice_id
+    })
     db.refresh(db_payment)
     return db_payment
 
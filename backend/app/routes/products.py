@@ -1,80 +1,217 @@
+import json
 import math
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from sqlalchemy import case, select
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
-from app.database import get_db
-from app.models.models import Product, ProductImage, Category
+from typing import List
+from app.database import get_db, SessionLocal
+from app.models.models import Product, ProductImage, Category, ProductRecommendation
 from app.schemas.schemas import (
-    ProductCreate, ProductUpdate, ProductResponse, ProductListResponse
+    ProductCreate, ProductUpdate, ProductResponse, ProductListItem, ProductListResponse, ProductSuggestion,
+    ProductImportResult, BulkProductUpdate, ProductChangeEntry, ProductChangesResponse, ProductAvailability
 )
 from app.utils.auth import require_permission
+from app.utils.cache import cached_response, PRODUCT_LIST, PRODUCT_DETAIL
+from app.utils.change_log import latest_changes, CHANGE_UPSERT
+from app.utils.category_tree import in_category_subtree
+from app.utils.counting import count_total
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_filter
+from app.utils.reservations import stock_status
+from app.utils.facets import product_facets
+from app.utils.product_import import import_format, import_products
+from app.utils.bulk_update import apply_bulk_update
+from app.utils.images import load_variants
+from app.utils.search import search_criterion, refresh_search_vector
+from app.utils.suggest import suggest_index, ensure_fresh
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
+# sort option -> (key column, descending, parser for the cursor value)
+# Each key is paired with Product.id as a tiebreaker so cursors are stable.
+PRODUCT_SORTS = {
+    "newest": (Product.created_at, True, datetime.fromisoformat),
+    "price_asc": (Product.price, False, Decimal),
+    "price_desc": (Product.price, True, Decimal),
+    "name": (Product.name, False, str),
+    "rating": (Product.rating_avg, True, Decimal),
+}
+
+
+def _primary_image(column):
+    """Correlated scalar subquery for one column of the product's primary (else first) image."""
+    return select(column).where(ProductImage.product_id == Product.id).order_by(
+        ProductImage.is_primary.desc(), ProductImage.sort_order, ProductImage.id
+    ).limit(1).scalar_subquery()
+
+
+def _compact_columns():
+    """Columns for view=compact: just what a grid card renders, fetched as plain rows."""
+    return [
+        Product.id, Product.name, Product.slug, Product.brand, Category.name.label("category_name"),
+        Product.price, Product.compare_price, Product.is_featured,
+        case(
+            (Product.stock - Product.reserved <= 0, "out_of_stock"),
+            (Product.stock - Product.reserved <= Product.low_stock_threshold, "low_stock"),
+            else_="in_stock"
+        ).label("stock_status"),
+        Product.rating_avg, Product.rating_count, Product.created_at,
+        _primary_image(ProductImage.image_url).label("image_url"),
+        _primary_image(ProductImage.variants).label("image_variants"),
+    ]
+
+
+def _listing_filters(db: Session, category, brand, search, fuzzy, min_price, max_price, featured):
+    """WHERE criteria for the listing, grouped by facet so facet counts can drop their own group.
+
+    Returns ``(filters, rank)`` where rank is the search relevance expression or None.
+    """
+    filters = {"base": [Product.is_active == True], "category": [], "brand": [], "price": []}
+    rank = None
+
+    if category:
+        cat = db.query(Category).filter(Category.slug == category).first()
+        if cat:
+            filters["category"].append(in_category_subtree(cat))
+    if brand:
+        filters["brand"].append(Product.brand.ilike(f"%{brand}%"))
+    if search:
+        criterion, rank = search_criterion(db, search, fuzzy)
+        filters["base"].append(criterion)
+    if min_price is not None:
+        filters["price"].append(Product.price >= min_price)
+    if max_price is not None:
+        filters["price"].append(Product.price <= max_price)
+    if featured is not None:
+        filters["base"].append(Product.is_featured == featured)
+    return filters, rank
+
 
 @router.get("", response_model=ProductListResponse)
 def list_products(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(12, ge=1, le=100),
     category: str = Query(None),
     brand: str = Query(None),
     search: str = Query(None),
+    fuzzy: bool = Query(False, description="Typo-tolerant trigram matching on name and SKU"),
     min_price: float = Query(None),
     max_price: float = Query(None),
-    sort: str = Query("newest"),
+    sort: str = Query(None, description="newest (default), price_asc, price_desc, name, rating or relevance (default for fuzzy search)"),
     featured: bool = Query(None),
+    cursor: str = Query(None, description="Keyset mode: pass an empty value for the first page, then next_cursor"),
+    with_total: bool = Query(None, description="Run the COUNT query; defaults to on in page mode, off in cursor mode"),
+    facets: bool = Query(False, description="Include brand/category/price-range counts"),
+    view: str = Query("full", pattern="^(full|compact)$", description="compact returns lightweight grid cards (ProductListItem)"),
     db: Session = Depends(get_db)
 ):
-    q = db.query(Product).options(joinedload(Product.images), joinedload(Product.category))
-    q = q.filter(Product.is_active == True)
+    if sort is None:
+        sort = "relevance" if search and fuzzy and cursor is None else "newest"
+    params = dict(
+        page=page, page_size=page_size, category=category, brand=brand, search=search, fuzzy=fuzzy,
+        min_price=min_price, max_price=max_price, sort=sort, featured=featured,
+        cursor=cursor, with_total=with_total, facets=facets, view=view
+    )
+    return cached_response(PRODUCT_LIST, params, lambda: _list_products(db, **params), request)
 
-    if category:
-        cat = db.query(Category).filter(Category.slug == category).first()
-        if cat:
-            q = q.filter(Product.category_id == cat.id)
-    if brand:
-        q = q.filter(Product.brand.ilike(f"%{brand}%"))
-    if search:
-        q = q.filter(or_(
-            Product.name.ilike(f"%{search}%"),
-            Product.description.ilike(f"%{search}%"),
-            Product.tags.ilike(f"%{search}%"),
-            Product.sku.ilike(f"%{search}%")
-        ))
-    if min_price is not None:
-        q = q.filter(Product.price >= min_price)
-    if max_price is not None:
-        q = q.filter(Product.price <= max_price)
-    if featured is not None:
-        q = q.filter(Product.is_featured == featured)
 
-    total = q.count()
+def _list_products(db: Session, page, page_size, category, brand, search, fuzzy, min_price, max_price,
+                   sort, featured, cursor, with_total, facets, view="full") -> ProductListResponse:
+    filters, rank = _listing_filters(db, category, brand, search, fuzzy, min_price, max_price, featured)
+    criteria = [c for group in filters.values() for c in group]
+
+    if with_total is None:
+        with_total = cursor is None
+    total, total_exact = count_total(db, db.query(Product).filter(*criteria)) if with_total else (None, True)
+
+    if view == "compact":
+        q = db.query(*_compact_columns()).outerjoin(Category, Product.category_id == Category.id)
+        item = ProductListItem
+    else:
+        q = db.query(Product).options(joinedload(Product.images), joinedload(Product.category))
+        item = ProductResponse
+    q = q.filter(*criteria)
 
-    if sort == "price_asc":
-        q = q.order_by(Product.price.asc())
-    elif sort == "price_desc":
-        q = q.order_by(Product.price.desc())
-    elif sort == "name":
-        q = q.order_by(Product.name.asc())
+    if sort == "relevance" and rank is not None:
+        if cursor is not None:
+            raise HTTPException(400, "Cursor pagination is not available for relevance sort")
+        q = q.order_by(rank.desc(), Product.id)
     else:
-        q = q.order_by(Product.created_at.desc())
+        if sort not in PRODUCT_SORTS:
+            sort = "newest"
+        column, descending, parse = PRODUCT_SORTS[sort]
+        if descending:
+            q = q.order_by(column.desc(), Product.id.desc())
+        else:
+            q = q.order_by(column.asc(), Product.id.asc())
+
+    next_cursor = None
+    if cursor is not None:
+        if cursor:
+            value, row_id = decode_cursor(cursor, sort, parse)
+            q = q.filter(keyset_filter(column, Product.id, value, row_id, descending))
+        products = q.limit(page_size + 1).all()
+        if len(products) > page_size:
+            products = products[:page_size]
+            last = products[-1]
+            next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+    else:
+        products = q.offset((page - 1) * page_size).limit(page_size).all()
 
-    products = q.offset((page - 1) * page_size).limit(page_size).all()
     return ProductListResponse(
-        products=[ProductResponse.model_validate(p) for p in products],
-        total=total, page=page, page_size=page_size,
-        total_pages=math.ceil(total / page_size) if total else 0
+        products=[item.model_validate(p) for p in products],
+        total=total, total_exact=total_exact, page=page, page_size=page_size,
+        total_pages=(math.ceil(total / page_size) if total else 0) if total is not None else None,
+        next_cursor=next_cursor,
+        facets=product_facets(db, filters) if facets else None
     )
 
 
+@router.get("/suggest", response_model=List[ProductSuggestion])
+def suggest_products(q: str = Query(..., min_length=1), limit: int = Query(8, ge=1, le=25)):
+    """Typeahead over product names, SKUs and brands, served from the in-memory prefix index."""
+    ensure_fresh(SessionLocal)
+    return suggest_index.search(q, limit)
+
+
+@router.get("/changes", response_model=ProductChangesResponse)
+def product_changes(
+    since: int = Query(0, ge=0, description="Change token from the previous call; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Products changed after ``since``: current state for upserts, tombstones for deletes and deactivations."""
+    rows, has_more = latest_changes(db, since, limit)
+    if not rows:
+        return ProductChangesResponse(changes=[], next_token=since, has_more=False)
+
+    upserts = [r.product_id for r in rows if r.kind == CHANGE_UPSERT]
+    products = {
+        p.id: p for p in db.query(Product).options(joinedload(Product.images), joinedload(Product.category))
+        .filter(Product.id.in_(upserts), Product.is_active == True)
+    } if upserts else {}
+    changes = []
+    for row in rows:
+        product = products.get(row.product_id)
+        changes.append(ProductChangeEntry(
+            seq=row.seq, id=row.product_id, deleted=product is None,
+            product=ProductResponse.model_validate(product) if product else None
+        ))
+    return ProductChangesResponse(changes=changes, next_token=rows[-1].seq, has_more=has_more)
+
+
 @router.get("/{slug}", response_model=ProductResponse)
-def get_product(slug: str, db: Session = Depends(get_db)):
-    product = db.query(Product).options(
-        joinedload(Product.images), joinedload(Product.category)
-    ).filter(Product.slug == slug).first()
-    if not product:
-        raise HTTPException(404, "Product not found")
-    return ProductResponse.model_validate(product)
+def get_product(slug: str, request: Request, db: Session = Depends(get_db)):
+    def build():
+        product = db.query(Product).options(
+            joinedload(Product.images), joinedload(Product.category)
+        ).filter(Product.slug == slug).first()
+        if not product:
+            raise HTTPException(404, "Product not found")
+        return ProductResponse.model_validate(product)
+    return cached_response(PRODUCT_DETAIL, {"slug": slug}, build, request)
 
 
 @router.post("", response_model=ProductResponse)
@@ -88,12 +225,34 @@ def create_product(req: ProductCreate, admin=Depends(require_permission("catalog
         raise HTTPException(400, "Slug already exists")
 
     product = Product(**req.model_dump())
+    refresh_search_vector(db, product)
     db.add(product)
     db.commit()
     db.refresh(product)
     return ProductResponse.model_validate(product)
 
 
+@router.post("/import", response_model=ProductImportResult)
+def import_product_file(
+    file: UploadFile = File(...),
+    format: str = Query(None, description="csv or jsonl; inferred from the file name when omitted"),
+    admin=Depends(require_permission("catalog:manage")), db: Session = Depends(get_db)
+):
+    """Bulk create/update products by SKU from a CSV or JSON Lines file.
+
+    Valid rows are written in committed chunks; invalid ones are skipped and listed in ``errors``.
+    """
+    return import_products(db, file.file, import_format(file.filename, format))
+
+
+@router.post("/bulk-update")
+def bulk_update_products(req: BulkProductUpdate, admin=Depends(require_permission("catalog:manage")), db: Session = Depends(get_db)):
+    """Change price, compare price and/or stock of many products (by sku or id) in one transaction."""
+    if any(item.stock_change for item in req.items):
+        require_permission("stock:manage")(admin)
+    return apply_bulk_update(db, req.items, req.reason, admin.id)
+
+
 @router.put("/{product_id}", response_model=ProductResponse)
 def update_product(product_id: str, req: ProductUpdate, admin=Depends(require_permission("catalog:manage")), db: Session = Depends(get_db)):
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -114,6 +273,7 @@ def update_product(product_id: str, req: ProductUpdate, admin=Depends(require_pe
 
     for field, value in req.model_dump(exclude_unset=True).items():
         setattr(product, field, value)
+    refresh_search_vector(db, product)
     db.commit()
     db.refresh(product)
     return ProductResponse.model_validate(product)
@@ -129,6 +289,33 @@ def delete_product(product_id: str, admin=Depends(require_permission("catalog:ma
     return {"message": "Product deleted"}
 
 
+@router.get("/{product_id}/availability", response_model=ProductAvailability)
+def get_availability(product_id: str, db: Session = Depends(get_db)):
+    """Units a shopper can still add, read fresh: cart holds change it without touching cached pages."""
+    row = db.query(Product.stock, Product.reserved, Product.low_stock_threshold).filter(
+        Product.id == product_id, Product.is_active == True
+    ).first()
+    if not row:
+        raise HTTPException(404, "Product not found")
+    return ProductAvailability(
+        id=product_id, available_stock=max(row.stock - row.reserved, 0),
+        stock_status=stock_status(row.stock, row.reserved, row.low_stock_threshold)
+    )
+
+
+@router.get("/{product_id}/recommendations", response_model=List[ProductResponse])
+def get_recommendations(product_id: str, limit: int = Query(6, ge=1, le=20), db: Session = Depends(get_db)):
+    """Products frequently bought together with this one (precomputed by scripts/build_recommendations.py)."""
+    products = db.query(Product).options(
+        joinedload(Product.images), joinedload(Product.category)
+    ).join(
+        ProductRecommendation, ProductRecommendation.recommended_product_id == Product.id
+    ).filter(
+        ProductRecommendation.product_id == product_id, Product.is_active == True
+    ).order_by(ProductRecommendation.rank).limit(limit).all()
+    return [ProductResponse.model_validate(p) for p in products]
+
+
 @router.post("/{product_id}/images")
 def add_product_image(
     product_id: str, image_url: str, alt_text: str = "", is_primary: bool = False,
@@ -143,7 +330,10 @@ def add_product_image(
             ProductImage.product_id == product_id
         ).update({"is_primary": False})
 
-    img = ProductImage(product_id=product_id, image_url=image_url, alt_text=alt_text, is_primary=is_primary)
+    img = ProductImage(
+        product_id=product_id, image_url=image_url, alt_text=alt_text, is_primary=is_primary,
+        variants=json.dumps(load_variants(image_url))
+    )
     db.add(img)
     db.commit()
     return {"message": "Image added", "id": img.id}
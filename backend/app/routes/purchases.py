@@ -16,6 +16,7 @@ from app.schemas.schemas import (
     PurchaseInvoiceCreate, PurchaseInvoiceUpdate, PurchaseInvoiceResponse
 )
 from app.utils.auth import require_permission
+from app.utils.numbering import next_number
 
 router = APIRouter(prefix="/api/purchases", tags=["Purchase Management"])
 
@@ -30,7 +31,10 @@ def create_purchase_order(
     db: Session = Depends(get_db),
     current_user = Depends(require_permission("purchase_orders:manage"))
 ):
-    """Create a new purchase order"""
+    """Create a new purchase order. A blank po_number takes the next number of the series."""
+    if not po.po_number:
+        po.po_number = next_number(db, "purchase_order", po.po_date)
+
     # Check if PO number already exists
     existing = db.query(PurchaseOrder).filter(PurchaseOrder.po_number == po.po_number).first()
     if existing:
@@ -239,7 +243,10 @@ def create_grn(
     db: Session = Depends(get_db),
     current_user = Depends(require_permission("grn:manage"))
 ):
-    """Create a new GRN and update inventory"""
+    """Create a new GRN and update inventory. A blank grn_number takes the next number of the series."""
+    if not grn.grn_number:
+        grn.grn_number = next_number(db, "grn", grn.grn_date)
+
     # Check if GRN number already exists
     existing = db.query(GoodsReceivedNote).filter(GoodsReceivedNote.grn_number == grn.grn_number).first()
     if existing:
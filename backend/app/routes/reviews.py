@@ -1,20 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.models.models import Review, Product, User
-from app.schemas.schemas import ReviewCreate, ReviewResponse
+from app.schemas.schemas import ReviewCreate, ReviewResponse, ReviewListResponse
 from app.utils.auth import get_current_user, require_permission
+from app.utils.ratings import apply_review_rating
 from typing import List
 
 router = APIRouter(prefix="/api/reviews", tags=["Reviews"])
 
 
-@router.get("/product/{product_id}", response_model=List[ReviewResponse])
-def get_product_reviews(product_id: str, db: Session = Depends(get_db)):
+@router.get("/product/{product_id}", response_model=ReviewListResponse)
+def get_product_reviews(
+    product_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    product = db.query(Product.rating_count).filter(Product.id == product_id).first()
+    if not product:
+        raise HTTPException(404, "Product not found")
     reviews = db.query(Review).options(joinedload(Review.user)).filter(
         Review.product_id == product_id, Review.is_approved == True
-    ).order_by(Review.created_at.desc()).all()
-    return [ReviewResponse.model_validate(r) for r in reviews]
+    ).order_by(Review.created_at.desc(), Review.id).offset((page - 1) * page_size).limit(page_size).all()
+    # rating_count is the approved-review count, so no COUNT query is needed
+    total = product.rating_count
+    return ReviewListResponse(
+        reviews=[ReviewResponse.model_validate(r) for r in reviews],
+        total=total, page=page, page_size=page_size,
+        total_pages=math.ceil(total / page_size) if total else 0
+    )
 
 
 @router.post("/product/{product_id}", response_model=ReviewResponse)
@@ -31,7 +48,7 @@ def add_review(product_id: str, req: ReviewCreate, user: User = Depends(get_curr
         raise HTTPException(400, "Rating must be 1-5")
 
     review = Review(product_id=product_id, user_id=user.id, **req.model_dump())
-    db.add(review)
+    db.add(review)  # new reviews start unapproved, so the product rating is unchanged until approval
     db.commit()
     db.refresh(review)
     return ReviewResponse.model_validate(review)
@@ -50,16 +67,27 @@ def approve_review(review_id: str, user=Depends(require_permission("reviews:mana
     review = db.query(Review).filter(Review.id == review_id).first()
     if not review:
         raise HTTPException(404, "Review not found")
-    review.is_approved = True
+    # Conditional UPDATE: of two concurrent approvals only one matches, so the rating is counted once
+    approved = db.execute(
+        update(Review).where(Review.id == review_id, Review.is_approved == False).values(is_approved=True)
+    ).rowcount
+    if approved == 1:
+        apply_review_rating(review.product, review.rating, 1)
     db.commit()
     return {"message": "Review approved"}
 
 
 @router.delete("/{review_id}")
 def delete_review(review_id: str, user=Depends(require_permission("reviews:manage")), db: Session = Depends(get_db)):
-    review = db.query(Review).filter(Review.id == review_id).first()
-    if not review:
+    # Only the request whose DELETE removes the row takes its rating back out
+    deleted = db.execute(
+        delete(Review).where(Review.id == review_id)
+        .returning(Review.product_id, Review.rating, Review.is_approved)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if deleted is None:
         raise HTTPException(404, "Review not found")
-    db.delete(review)
+    if deleted.is_approved:
+        apply_review_rating(db.get(Product, deleted.product_id), deleted.rating, -1)
     db.commit()
     return {"message": "Review deleted"}
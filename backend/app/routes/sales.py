@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 from datetime import timedelta
@@ -16,6 +16,9 @@ from app.schemas.schemas import (
     SalesInvoiceCreate, SalesInvoiceUpdate, SalesInvoiceResponse
 )
 from app.utils.auth import require_permission
+from app.utils.idempotency import idempotent
+from app.utils.numbering import next_number
+from app.utils.outbox import publish
 
 router = APIRouter(prefix="/api/sales", tags=["Sales Management"])
 
@@ -409,17 +412,26 @@ def update_sales_order(
 @router.post("/invoices", response_model=SalesInvoiceResponse)
 def create_sales_invoice(
     invoice: SalesInvoiceCreate,
+    request: Request,
     db: Session = Depends(get_db),
     current_user = Depends(require_permission("sales_invoices:manage"))
 ):
-    """Create a new sales invoice and update inventory"""
+    """Create a new sales invoice and update inventory. Retries may send an Idempotency-Key header."""
+    return idempotent(
+        request, db, current_user.id, invoice, SalesInvoiceResponse,
+        lambda: _create_sales_invoice(invoice, db, current_user)
+    )
+
+
+def _create_sales_invoice(invoice: SalesInvoiceCreate, db: Session, current_user):
     # Normalize invoice number
     invoice.invoice_number = invoice.invoice_number.upper()
     
     # Check if invoice number exists
-    existing = db.query(SalesInvoice).filter(SalesInvoice.invoice_number == invoice.invoice_number).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Invoice number already exists")
+    if invoice.invoice_number:
+        existing = db.query(SalesInvoice).filter(SalesInvoice.invoice_number == invoice.invoice_number).first()
+        if existing:
+            raise HTTPException(status_code=400, detail="Invoice number already exists")
     
     # Calculate totals
     subtotal = 0
@@ -465,6 +477,11 @@ def create_sales_invoice(
         days = days_map.get(invoice.payment_terms, 0)
         due_date = invoice.invoice_date + timedelta(days=days)
     
+    # A blank invoice number takes the next gapless GST serial. The series row stays
+    # locked until commit, so it is allocated as late as possible.
+    if not invoice.invoice_number:
+        invoice.invoice_number = next_number(db, "sales_invoice", invoice.invoice_date)
+    
     # Create invoice
     db_invoice = SalesInvoice(
         invoice_number=invoice.invoice_number,
@@ -576,7 +593,11 @@ def create_sales_invoice(
     if customer:
         customer.current_balance = B2BCustomer.current_balance + total
     
-    db.commit()
+    publish(db, "sales_invoice.created", {
+        "invoice_id": db_invoice.id, "invoice_number": db_invoice.invoice_number,
+        "customer_id": invoice.customer_id, "invoice_date": invoice.invoice_date, "total": total
+    })
+    db.flush()
     db.refresh(db_invoice)
     
     # Load relationships
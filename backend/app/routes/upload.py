@@ -1,29 +1,81 @@
 import os
+import asyncio
+import hashlib
+import anyio
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, UnidentifiedImageError
 from app.config import settings
 from app.utils.auth import require_staff_or_admin
+from app.utils.images import RESIZABLE_EXTENSIONS, image_pool, render_variants, load_variants
 import uuid
 
 router = APIRouter(prefix="/api/upload", tags=["Upload"])
 
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def _verify_image(path: str):
+    with Image.open(path) as img:
+        img.verify()
+
 
 @router.post("")
 async def upload_file(file: UploadFile = File(...), admin=Depends(require_staff_or_admin)):
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    await anyio.Path(settings.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 
-    ext = os.path.splitext(file.filename)[1]
+    ext = os.path.splitext(file.filename)[1].lower()
     allowed = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg"}
-    if ext.lower() not in allowed:
+    if ext not in allowed:
         raise HTTPException(400, f"File type {ext} not allowed. Use: {allowed}")
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(400, "File too large. Max 5MB")
 
-    filename = f"{uuid.uuid4()}{ext}"
-    filepath = os.path.join(settings.UPLOAD_DIR, filename)
+    # Copy to a temp file, hashing as we go; files are stored under their content hash
+    # so the same photo uploaded for many SKUs is kept once. The size check here is a
+    # backstop only: UploadFile has already spooled the whole body before this runs.
+    tmp_path = os.path.join(settings.UPLOAD_DIR, f".upload-{uuid.uuid4()}")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(400, "File too large. Max 5MB")
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        await anyio.Path(tmp_path).unlink(missing_ok=True)
+        raise
 
-    content = await file.read()
-    if len(content) > 5 * 1024 * 1024:
-        raise HTTPException(400, "File too large. Max 5MB")
+    filename = f"{digest.hexdigest()}{ext}"
+    filepath = os.path.join(settings.UPLOAD_DIR, filename)
+    url = f"/uploads/{filename}"
+    # Link atomically: of concurrent uploads of the same image exactly one creates the file,
+    # and only that one renders variants (or removes the file if it is not an image).
+    try:
+        await anyio.to_thread.run_sync(os.link, tmp_path, filepath)
+    except FileExistsError:
+        variants = await run_in_threadpool(load_variants, url)
+        if not variants and ext in RESIZABLE_EXTENSIONS:
+            # Still being rendered by the upload that stored it (or stored before variants existed)
+            try:
+                await run_in_threadpool(_verify_image, filepath)
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+                raise HTTPException(400, "File is not a valid image")
+        return {"url": url, "filename": filename, "variants": variants}
+    finally:
+        await anyio.Path(tmp_path).unlink(missing_ok=True)
 
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # Resize off the event loop, in the image worker processes
+    variants = {}
+    if ext in RESIZABLE_EXTENSIONS:
+        try:
+            variants = await asyncio.get_running_loop().run_in_executor(image_pool(), render_variants, filepath)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            await anyio.Path(filepath).unlink(missing_ok=True)
+            raise HTTPException(400, "File is not a valid image")
 
-    return {"url": f"/uploads/{filename}", "filename": filename}
+    return {"url": url, "filename": filename, "variants": variants}
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional, List, Any
+from pydantic import BaseModel, EmailStr, Field, field_validator, computed_field
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, date
 import json
 
@@ -98,18 +98,46 @@ class CategoryResponse(BaseModel):
     is_active: bool
     sort_order: int
     created_at: datetime
-    product_count: Optional[int] = 0
+    product_count: Optional[int] = 0  # Includes products in all subcategories
+    direct_product_count: Optional[int] = 0  # Products assigned to this category itself
     class Config:
         from_attributes = True
 
 
 # ─── PRODUCT ────────────────────────────────────────────
+def _parse_variants(v: Any) -> Any:
+    if isinstance(v, str):
+        try:
+            return json.loads(v or "{}")
+        except ValueError:
+            return {}
+    return v or {}
+
+def _srcset(variants: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    return {
+        fmt: ", ".join(f"{v[fmt]} {v['width']}w" for v in variants.values() if fmt in v)
+        for fmt in ("webp", "jpeg") if any(fmt in v for v in variants.values())
+    }
+
 class ProductImageResponse(BaseModel):
     id: str
     image_url: str
     alt_text: str
     sort_order: int
     is_primary: bool
+    variants: Dict[str, Dict[str, Any]] = {}  # size -> {width, height, webp, jpeg}
+
+    @field_validator('variants', mode='before')
+    @classmethod
+    def parse_variants(cls, v: Any) -> Any:
+        return _parse_variants(v)
+
+    @computed_field
+    @property
+    def srcset(self) -> Dict[str, str]:
+        """Ready-to-use srcset per format, e.g. {"webp": "/uploads/a-thumb.webp 200w, ..."}."""
+        return _srcset(self.variants)
+
     class Config:
         from_attributes = True
 
@@ -136,6 +164,7 @@ class ProductCreate(BaseModel):
 class ProductUpdate(BaseModel):
     name: Optional[str] = None
     slug: Optional[str] = None
+    sku: Optional[str] = None
     hsn_code: Optional[str] = None
     description: Optional[str] = None
     short_description: Optional[str] = None
@@ -167,24 +196,153 @@ class ProductResponse(BaseModel):
     category: Optional[CategoryResponse] = None
     brand: str
     stock: int
+    reserved: int = Field(default=0, exclude=True)
     low_stock_threshold: int
     weight: Optional[float]
     unit: str
     is_active: bool
     is_featured: bool
     tags: str
+    rating_avg: float = 0
+    rating_count: int = 0
     images: List[ProductImageResponse] = []
     created_at: datetime
     updated_at: datetime
+
+    @computed_field
+    @property
+    def stock_status(self) -> str:
+        """in_stock, low_stock or out_of_stock, counting units held in other carts as taken."""
+        available = self.stock - self.reserved
+        if available <= 0:
+            return "out_of_stock"
+        return "low_stock" if available <= self.low_stock_threshold else "in_stock"
+
+    class Config:
+        from_attributes = True
+
+# Live availability; kept out of ProductResponse because cached pages only follow stock_status flips
+class ProductAvailability(BaseModel):
+    id: str
+    available_stock: int  # units not held by any cart (a shopper's own hold is already in their cart line)
+    stock_status: str
+
+# Grid card row for list_products(view=compact); built from a column-projected query
+class ProductListItem(BaseModel):
+    id: str
+    name: str
+    slug: str
+    brand: str
+    category_name: Optional[str] = None
+    price: float
+    compare_price: Optional[float]
+    is_featured: bool
+    stock_status: str  # in_stock, low_stock or out_of_stock
+    rating_avg: float = 0
+    rating_count: int = 0
+    image_url: Optional[str] = None  # Primary image, original upload
+    image_variants: Dict[str, Dict[str, Any]] = Field(default={}, exclude=True)
+
+    @field_validator('image_variants', mode='before')
+    @classmethod
+    def parse_variants(cls, v: Any) -> Any:
+        return _parse_variants(v)
+
+    @computed_field
+    @property
+    def image_srcset(self) -> Dict[str, str]:
+        return _srcset(self.image_variants)
+
     class Config:
         from_attributes = True
 
+class ProductSuggestion(BaseModel):
+    id: str
+    name: str
+    slug: str
+    sku: str
+    brand: str
+
+class FacetValue(BaseModel):
+    value: str
+    label: str
+    count: int
+
+class PriceRangeFacet(BaseModel):
+    min: float
+    max: Optional[float] = None  # None for the open-ended top bucket
+    count: int
+
+class ProductFacets(BaseModel):
+    brands: List[FacetValue] = []
+    categories: List[FacetValue] = []
+    price_ranges: List[PriceRangeFacet] = []
+
 class ProductListResponse(BaseModel):
-    products: List[ProductResponse]
-    total: int
+    products: List[Union[ProductResponse, ProductListItem]]  # ProductListItem for view=compact
+    total: Optional[int] = None  # None when the count was skipped (with_total=false)
+    total_exact: bool = True  # False when total is an estimate or a recently cached count
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Keyset mode only; absent on the last page
+    facets: Optional[ProductFacets] = None  # Only when requested with facets=true
+
+class ProductChangeEntry(BaseModel):
+    seq: int
+    id: str
+    deleted: bool  # tombstone: product was deleted or deactivated
+    product: Optional[ProductResponse] = None  # current state, absent for tombstones
+
+class ProductChangesResponse(BaseModel):
+    changes: List[ProductChangeEntry]
+    next_token: int  # pass back as ?since= to continue
+    has_more: bool
+
+# Bulk import line; only sku is required when it updates an existing product
+class ProductImportRow(BaseModel):
+    sku: str
+    name: Optional[str] = None
+    slug: Optional[str] = None
+    hsn_code: Optional[str] = None
+    description: Optional[str] = None
+    short_description: Optional[str] = None
+    price: Optional[float] = None
+    compare_price: Optional[float] = None
+    cost_price: Optional[float] = None
+    category_id: Optional[str] = None
+    category: Optional[str] = None  # category slug, alternative to category_id
+    brand: Optional[str] = None
+    stock: Optional[int] = None  # opening stock, applied to new products only
+    low_stock_threshold: Optional[int] = None
+    weight: Optional[float] = None
+    unit: Optional[str] = None
+    is_active: Optional[bool] = None
+    is_featured: Optional[bool] = None
+    tags: Optional[str] = None
+
+class ProductImportError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    error: str
+
+class ProductImportResult(BaseModel):
+    total_rows: int
+    created: int
+    updated: int
+    failed: int
+    errors: List[ProductImportError]
+
+class BulkProductUpdateItem(BaseModel):
+    sku: Optional[str] = None  # identify the product by sku or id
+    id: Optional[str] = None
+    price: Optional[float] = None
+    compare_price: Optional[float] = None  # send null to clear, omit to keep
+    stock_change: int = 0
+
+class BulkProductUpdate(BaseModel):
+    items: List[BulkProductUpdateItem]
+    reason: str = ""  # recorded on the inventory log rows
 
 
 # ─── CART ────────────────────────────────────────────────
@@ -267,6 +425,7 @@ class OrderStatusUpdate(BaseModel):
 class OrderListResponse(BaseModel):
     orders: List[OrderResponse]
     total: int
+    total_exact: bool = True  # False when total is an estimate or a recently cached count
     page: int
     page_size: int
 
@@ -323,6 +482,13 @@ class ReviewResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ReviewListResponse(BaseModel):
+    reviews: List[ReviewResponse]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
 
 # ─── WISHLIST ───────────────────────────────────────────
 class WishlistResponse(BaseModel):
@@ -706,7 +872,7 @@ class PurchaseOrderItemResponse(BaseModel):
         from_attributes = True
 
 class PurchaseOrderCreate(BaseModel):
-    po_number: str
+    po_number: str = ""  # blank: next number of the purchase_order series
     supplier_id: str
     warehouse_id: Optional[str] = None
     po_date: date
@@ -776,7 +942,7 @@ class GRNItemResponse(BaseModel):
         from_attributes = True
 
 class GRNCreate(BaseModel):
-    grn_number: str
+    grn_number: str = ""  # blank: next number of the grn series
     po_id: Optional[str] = None
     supplier_id: str
     warehouse_id: Optional[str] = None
@@ -1052,7 +1218,7 @@ class SalesInvoiceItemResponse(BaseModel):
         from_attributes = True
 
 class SalesInvoiceCreate(BaseModel):
-    invoice_number: str
+    invoice_number: str = ""  # blank: next number of the sales_invoice series
     customer_id: str
     sales_order_id: Optional[str] = None
     delivery_note_id: Optional[str] = None
@@ -1133,7 +1299,7 @@ class SalesInvoiceResponse(BaseModel):
 
 # ─── PAYMENT ─────────────────────────────────────────────
 class PaymentCreate(BaseModel):
-    payment_number: str
+    payment_number: str = ""  # blank: next number of the payment series
     payment_type: str  # 'purchase' or 'sales'
     payment_date: date
     amount: float
@@ -0,0 +1,130 @@
+"""
+Set-based bulk price / stock updates.
+
+A supplier price revision touching thousands of SKUs is applied in one transaction:
+one SELECT resolves SKUs and ids, then on PostgreSQL one
+``UPDATE products ... FROM (VALUES ...)`` per ``BULK_UPDATE_CHUNK_SIZE`` items
+changes prices and stock together, and every stock movement is logged with one
+batched ``InventoryLog`` insert. Other dialects run the same UPDATE as an executemany.
+"""
+from fastapi import HTTPException
+from sqlalchemy import Boolean, Integer, Numeric, String, bindparam, case, cast, column, insert, or_, select, update, values
+from sqlalchemy.orm import Session
+from app.models.models import Product, InventoryLog
+from app.utils.cache import catalog_cache, PRODUCT_LIST, PRODUCT_DETAIL
+from app.utils.search import is_postgres
+from app.utils.change_log import record_product_changes
+
+BULK_UPDATE_CHUNK_SIZE = 2000
+
+_PRICE = Numeric(10, 2)
+
+
+def _resolve(db: Session, items) -> list:
+    """Map every item to its product row; all-or-nothing, so unknown or repeated products are a 400."""
+    if any(not (item.sku or item.id) for item in items):
+        raise HTTPException(400, "Each item needs a sku or an id")
+    skus = {item.sku.strip().upper() for item in items if item.sku}
+    ids = {item.id for item in items if item.id and not item.sku}
+    rows = db.execute(
+        select(Product.id, Product.sku, Product.stock).where(or_(Product.sku.in_(skus), Product.id.in_(ids)))
+    ).all()
+    by_sku = {row.sku: row for row in rows}
+    by_id = {row.id: row for row in rows}
+
+    resolved, missing, seen = [], [], set()
+    for item in items:
+        key = item.sku.strip().upper() if item.sku else item.id
+        row = by_sku.get(key) if item.sku else by_id.get(key)
+        if row is None:
+            missing.append(key)
+            continue
+        if row.id in seen:
+            raise HTTPException(400, f"Product {row.sku} is listed more than once")
+        seen.add(row.id)
+        resolved.append((row, item))
+    if missing:
+        raise HTTPException(400, f"Products not found: {', '.join(missing[:20])}")
+
+    negative = [row.sku for row, item in resolved if row.stock + item.stock_change < 0]
+    if negative:
+        raise HTTPException(400, f"Stock cannot be negative: {', '.join(negative[:20])}")
+    return resolved
+
+
+def _params(row, item) -> dict:
+    fields = item.model_fields_set
+    return {
+        "b_id": row.id,
+        "b_set_price": item.price is not None,
+        "b_price": item.price,
+        "b_set_compare_price": "compare_price" in fields,
+        "b_compare_price": item.compare_price,
+        "b_stock_change": item.stock_change,
+    }
+
+
+def _update_from_values(db: Session, chunk) -> int:
+    data = values(
+        column("id", String), column("set_price", Boolean), column("price", _PRICE),
+        column("set_compare_price", Boolean), column("compare_price", _PRICE), column("stock_change", Integer),
+        name="v",
+    ).data([tuple(p.values()) for p in chunk])
+    stmt = (
+        update(Product)
+        .where(Product.id == data.c.id, Product.stock + data.c.stock_change >= 0)
+        .values(
+            price=case((data.c.set_price, cast(data.c.price, _PRICE)), else_=Product.price),
+            compare_price=case((data.c.set_compare_price, cast(data.c.compare_price, _PRICE)), else_=Product.compare_price),
+            stock=Product.stock + data.c.stock_change,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount
+
+
+def _update_executemany(db: Session, chunk) -> int:
+    stmt = (
+        update(Product.__table__)
+        .where(Product.id == bindparam("b_id"), Product.stock + bindparam("b_stock_change") >= 0)
+        .values(
+            price=case((bindparam("b_set_price"), bindparam("b_price", type_=_PRICE)), else_=Product.price),
+            compare_price=case(
+                (bindparam("b_set_compare_price"), bindparam("b_compare_price", type_=_PRICE)),
+                else_=Product.compare_price
+            ),
+            stock=Product.stock + bindparam("b_stock_change"),
+        )
+    )
+    return db.connection().execute(stmt, chunk).rowcount
+
+
+def apply_bulk_update(db: Session, items, reason: str, user_id: str) -> dict:
+    """Apply price/compare_price/stock changes for ``items`` and log stock movements; commits."""
+    if not items:
+        raise HTTPException(400, "No items to update")
+    resolved = _resolve(db, items)
+    params = [_params(row, item) for row, item in resolved]
+    write = _update_from_values if is_postgres(db) else _update_executemany
+
+    updated = 0
+    for start in range(0, len(params), BULK_UPDATE_CHUNK_SIZE):
+        updated += write(db, params[start:start + BULK_UPDATE_CHUNK_SIZE])
+    if updated != len(params):
+        # The stock guard dropped a row: another transaction took stock after _resolve read it
+        db.rollback()
+        raise HTTPException(409, "Stock changed while applying the update; please retry")
+
+    logs = [
+        {"product_id": row.id, "change": item.stock_change, "reason": reason or "Bulk update", "performed_by": user_id}
+        for row, item in resolved if item.stock_change
+    ]
+    if logs:
+        db.execute(insert(InventoryLog), logs)
+    record_product_changes(db, [row.id for row, _ in resolved])
+    db.commit()
+
+    # Set-based statements bypass the ORM events that normally invalidate these
+    catalog_cache.invalidate(PRODUCT_LIST)
+    catalog_cache.invalidate(PRODUCT_DETAIL)
+    return {"message": f"{updated} product(s) updated", "updated": updated, "stock_logs": len(logs)}
@@ -0,0 +1,277 @@
+"""
+Read-through response cache for the public catalog endpoints.
+
+Responses are cached as serialized JSON bytes under ``<namespace>:<generation>:<params>``.
+Invalidation is either precise (delete one key, e.g. a single product slug) or
+namespace-wide (bump the generation so every older key becomes unreachable and ages
+out via TTL/LRU). The backend is in-process by default; set ``CACHE_BACKEND=redis``
+to share entries and invalidations between workers.
+
+Each entry is stored as ``<etag> <body>``, the ETag being a hash of the body taken when
+the entry is built, so conditional requests (``If-None-Match``) are answered with a
+304 straight from the cache.
+
+Writes are picked up from the ORM: ``register_cache_invalidation`` hooks the session so
+that any committed change to products, images, categories or banners - including stock
+movements from orders, GRNs and sales - invalidates the affected entries.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from app.config import settings
+from app.utils.etag import make_etag, etag_matches, not_modified, tag_response
+
+PRODUCT_LIST = "products"
+PRODUCT_DETAIL = "product"
+CATEGORIES = "categories"
+BANNERS = "banners"
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace: str):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend; requires the ``redis`` package (not installed by default)."""
+
+    def __init__(self, url: str, prefix: str = "sh-cache:"):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def generation(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}gen:{namespace}") or 0)
+
+    def bump_generation(self, namespace: str):
+        self.client.incr(f"{self.prefix}gen:{namespace}")
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(params: dict) -> str:
+        """Stable key for a parameter set: sorted, None dropped, strings trimmed."""
+        parts = []
+        for name in sorted(params):
+            value = params[name]
+            if value is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+            parts.append(f"{name}={value}")
+        return "&".join(parts)
+
+    def _key(self, namespace: str, params: dict) -> str:
+        return f"{namespace}:{self.backend.generation(namespace)}:{self.normalize(params)}"
+
+    def _count(self, namespace: str, counter: str):
+        with self._lock:
+            stats = self._counters.setdefault(namespace, {"hits": 0, "misses": 0, "invalidations": 0})
+            stats[counter] += 1
+
+    def get_or_build(self, namespace: str, params: dict, build) -> tuple:
+        """Return ``(etag, json_bytes)`` from the cache, or call ``build()`` and cache its JSON-encoded result."""
+        if not self.enabled:
+            body = json.dumps(jsonable_encoder(build())).encode("utf-8")
+            return make_etag(body), body
+        key = self._key(namespace, params)
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._count(namespace, "hits")
+            etag, _, body = entry.partition(b" ")
+            return etag.decode(), body
+        self._count(namespace, "misses")
+        body = json.dumps(jsonable_encoder(build())).encode("utf-8")
+        etag = make_etag(body)
+        self.backend.set(key, etag.encode() + b" " + body, self.ttl)
+        return etag, body
+
+    def invalidate(self, namespace: str, params: dict = None):
+        """Drop one entry (``params`` given) or the whole namespace."""
+        if params is None:
+            self.backend.bump_generation(namespace)
+        else:
+            self.backend.delete(self._key(namespace, params))
+        self._count(namespace, "invalidations")
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces = {ns: dict(c) for ns, c in self._counters.items()}
+        hits = sum(c["hits"] for c in namespaces.values())
+        misses = sum(c["misses"] for c in namespaces.values())
+        return {
+            "backend": type(self.backend).__name__,
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "entries": self.backend.size(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "namespaces": namespaces,
+        }
+
+
+def _build_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(settings.CACHE_URL)
+    return MemoryBackend(settings.CACHE_MAX_ENTRIES)
+
+
+catalog_cache = ResponseCache(
+    _build_backend(), ttl=settings.CACHE_TTL_SECONDS, enabled=settings.CACHE_BACKEND != "none"
+)
+
+
+def cached_response(namespace: str, params: dict, build, request: Request = None) -> Response:
+    """Serve ``build()`` through the catalog cache as a JSON response, or a 304 if ``request`` has the same ETag."""
+    etag, body = catalog_cache.get_or_build(namespace, params, build)
+    if request is not None and etag_matches(request, etag):
+        return not_modified(etag)
+    response = Response(body, media_type="application/json")
+    tag_response(response, etag)
+    return response
+
+
+def invalidate_products(slugs):
+    """Invalidate listings and the given product pages after a set-based stock write."""
+    catalog_cache.invalidate(PRODUCT_LIST)
+    for slug in slugs:
+        catalog_cache.invalidate(PRODUCT_DETAIL, {"slug": slug})
+
+
+def queue_product_invalidation(session, slugs):
+    """Like invalidate_products, but applied when ``session`` commits (and dropped on rollback)."""
+    pending = session.info.setdefault("cache_invalidations", set())
+    pending.add((PRODUCT_LIST, None))
+    pending.update((PRODUCT_DETAIL, slug) for slug in slugs)
+
+
+# ─── ORM-driven invalidation ────────────────────────────
+def _slugs(state) -> set:
+    """Current and previous slug of a product (a rename must drop the old key too)."""
+    history = state.attrs.slug.history
+    return {s for s in (*history.unchanged, *history.added, *history.deleted) if s}
+
+
+def _collect(session, flush_context):
+    from app.models.models import Product, ProductImage, Category, Banner
+
+    pending = session.info.setdefault("cache_invalidations", set())
+    changed = [(obj, "new") for obj in session.new] + [(obj, "deleted") for obj in session.deleted]
+    # Not filtered with session.is_modified(): it reports False for attributes set to SQL
+    # expressions (e.g. rating_count = rating_count + 1), which still change the row.
+    changed += [(obj, "dirty") for obj in session.dirty]
+
+    for obj, kind in changed:
+        if isinstance(obj, Product):
+            state = inspect(obj)
+            pending.add((PRODUCT_LIST, None))
+            for slug in _slugs(state):
+                pending.add((PRODUCT_DETAIL, slug))
+            if kind != "dirty" or state.attrs.category_id.history.has_changes():
+                pending.add((CATEGORIES, None))
+        elif isinstance(obj, ProductImage):
+            pending.add((PRODUCT_LIST, None))
+            product = obj.product or session.get(Product, obj.product_id)
+            if product is not None:
+                pending.add((PRODUCT_DETAIL, product.slug))
+        elif isinstance(obj, Category):
+            # Listings and detail pages embed the category, so drop them wholesale.
+            pending.update({(CATEGORIES, None), (PRODUCT_LIST, None), (PRODUCT_DETAIL, None)})
+        elif isinstance(obj, Banner):
+            pending.add((BANNERS, None))
+
+
+def _apply(session):
+    pending = session.info.pop("cache_invalidations", None)
+    if not pending:
+        return
+    wiped = {ns for ns, slug in pending if slug is None}
+    for namespace, slug in pending:
+        if slug is None:
+            catalog_cache.invalidate(namespace)
+        elif namespace not in wiped:
+            catalog_cache.invalidate(namespace, {"slug": slug})
+
+
+def _discard(session):
+    session.info.pop("cache_invalidations", None)
+
+
+def register_cache_invalidation(session_factory):
+    event.listen(session_factory, "after_flush", _collect)
+    event.listen(session_factory, "after_commit", _apply)
+    event.listen(session_factory, "after_rollback", _discard)
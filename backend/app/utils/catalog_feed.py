@@ -0,0 +1,216 @@
+"""
+Streaming catalog feeds (CSV / Google Merchant XML) and sitemaps.
+
+Every generator opens its own session and reads active products with
+``yield_per`` (a server-side cursor on PostgreSQL), rendering rows into text
+chunks of ``FEED_CHUNK_SIZE`` products that go straight into a
+``StreamingResponse``. Memory stays flat however large the catalog is, and no
+request ever holds more than one chunk of ORM-free rows. The streamed queries do
+not use the request's ``get_db`` session because that is closed before a streamed
+body is sent.
+
+Sitemaps follow the protocol limit of ``SITEMAP_MAX_URLS`` URLs per file. A catalog
+that fits is served as a single ``/sitemap.xml`` urlset. A larger one turns
+``/sitemap.xml`` into a sitemap index listing ``/sitemap-pages.xml`` (store pages
+and categories) plus one ``/sitemap-products-<id>.xml`` per block of products, named
+after the first product id of the block. Each file is read by keyset from that id,
+so generating the last file costs no more than the first.
+"""
+import csv
+import io
+import math
+from xml.sax.saxutils import escape
+from sqlalchemy import func, select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.models import Product, ProductImage, Category
+
+FEED_CHUNK_SIZE = 1000
+SITEMAP_MAX_URLS = 50000
+
+# Storefront pages worth indexing, with their change frequency
+STORE_PAGES = [
+    ("/", "daily"), ("/shop", "daily"), ("/about", "monthly"), ("/contact", "monthly"),
+    ("/faq", "monthly"), ("/terms", "yearly"), ("/privacy", "yearly"),
+    ("/cancellation-refund", "yearly"), ("/shipping-exchange", "yearly"),
+]
+
+FEED_FIELDS = [
+    "id", "title", "description", "link", "image_link", "availability", "price",
+    "sale_price", "brand", "mpn", "product_type", "condition",
+]
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def site_url(path: str) -> str:
+    """Absolute storefront URL for ``path``; absolute URLs (CDN images) pass through."""
+    if path.startswith(("http://", "https://")):
+        return path
+    return settings.SITE_URL.rstrip("/") + path
+
+
+def _primary_image_url():
+    return select(ProductImage.image_url).where(ProductImage.product_id == Product.id).order_by(
+        ProductImage.is_primary.desc(), ProductImage.sort_order, ProductImage.id
+    ).limit(1).scalar_subquery()
+
+
+def _active_products(*columns):
+    return select(*columns).where(Product.is_active == True).order_by(Product.id)
+
+
+def _stream(stmt, render, head: str = "", tail: str = ""):
+    """Run ``stmt`` through a server-side cursor, yielding ``head``, rendered chunks and ``tail``."""
+    db = SessionLocal()
+    try:
+        if head:
+            yield head
+        result = db.execute(stmt.execution_options(yield_per=FEED_CHUNK_SIZE))
+        for rows in result.partitions():
+            yield "".join(render(row) for row in rows)
+        if tail:
+            yield tail
+    finally:
+        db.close()
+
+
+def _money(value) -> str:
+    return f"{value:.2f} INR"
+
+
+def _feed_rows():
+    return _active_products(
+        Product.id, Product.sku, Product.name, Product.slug, Product.short_description,
+        Product.description, Product.brand, Product.price, Product.compare_price, Product.stock,
+        Product.reserved, Category.name.label("category_name"), _primary_image_url().label("image_url"),
+    ).outerjoin(Category, Product.category_id == Category.id)
+
+
+def _feed_record(row) -> dict:
+    # Merchant feeds expect the regular price in "price" and the discounted one in "sale_price"
+    on_sale = row.compare_price is not None and row.compare_price > row.price
+    return {
+        "id": row.sku,
+        "title": row.name,
+        "description": row.short_description or row.description or row.name,
+        "link": site_url(f"/product/{row.slug}"),
+        "image_link": site_url(row.image_url) if row.image_url else "",
+        "availability": "in_stock" if row.stock - row.reserved > 0 else "out_of_stock",
+        "price": _money(row.compare_price if on_sale else row.price),
+        "sale_price": _money(row.price) if on_sale else "",
+        "brand": row.brand or "",
+        "mpn": row.sku,
+        "product_type": row.category_name or "",
+        "condition": "new",
+    }
+
+
+def stream_feed_csv():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FEED_FIELDS)
+
+    def take() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writeheader()
+    header = take()
+
+    def render(row) -> str:
+        writer.writerow(_feed_record(row))
+        return take()
+
+    return _stream(_feed_rows(), render, head=header)
+
+
+def stream_feed_xml():
+    head = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+        f"<title>Senapati Hardware</title>\n<link>{escape(site_url('/'))}</link>\n"
+        "<description>Senapati Hardware product catalog</description>\n"
+    )
+
+    def render(row) -> str:
+        fields = "".join(
+            f"<g:{name}>{escape(str(value))}</g:{name}>"
+            for name, value in _feed_record(row).items() if value
+        )
+        return f"<item>{fields}</item>\n"
+
+    return _stream(_feed_rows(), render, head=head, tail="</channel>\n</rss>\n")
+
+
+# ── Sitemaps ──
+
+def _url(loc: str, lastmod=None, changefreq: str = None) -> str:
+    parts = [f"<loc>{escape(loc)}</loc>"]
+    if lastmod is not None:
+        parts.append(f"<lastmod>{lastmod.date().isoformat()}</lastmod>")
+    if changefreq:
+        parts.append(f"<changefreq>{changefreq}</changefreq>")
+    return f"<url>{''.join(parts)}</url>\n"
+
+
+_URLSET_HEAD = f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+_URLSET_TAIL = "</urlset>\n"
+
+
+def _page_urls(db) -> str:
+    urls = [_url(site_url(path), changefreq=freq) for path, freq in STORE_PAGES]
+    for (slug,) in db.execute(select(Category.slug).where(Category.is_active == True).order_by(Category.slug)):
+        urls.append(_url(site_url(f"/shop?category={slug}"), changefreq="weekly"))
+    return "".join(urls)
+
+
+def _product_urls(start: str = None, limit: int = None):
+    stmt = _active_products(Product.slug, Product.updated_at).limit(limit)
+    if start is not None:
+        stmt = stmt.where(Product.id >= start)
+    return stmt, lambda row: _url(site_url(f"/product/{row.slug}"), row.updated_at, "weekly")
+
+
+def sitemap_plan(db) -> tuple:
+    """Return ``(is_index, product_files)``: whether /sitemap.xml must be an index, and how many product files it lists."""
+    products = db.scalar(select(func.count()).select_from(Product).where(Product.is_active == True))
+    categories = db.scalar(select(func.count()).select_from(Category).where(Category.is_active == True))
+    if products + categories + len(STORE_PAGES) <= SITEMAP_MAX_URLS:
+        return False, 0
+    return True, math.ceil(products / SITEMAP_MAX_URLS)
+
+
+def sitemap_file_starts(db) -> list:
+    """First product id of each ``SITEMAP_MAX_URLS`` block, in one pass over the active ids."""
+    numbered = select(
+        Product.id, func.row_number().over(order_by=Product.id).label("rn")
+    ).where(Product.is_active == True).subquery()
+    return db.scalars(
+        select(numbered.c.id).where((numbered.c.rn - 1) % SITEMAP_MAX_URLS == 0).order_by(numbered.c.id)
+    ).all()
+
+
+def stream_sitemap_index(starts: list):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    names = ["sitemap-pages.xml"] + [f"sitemap-products-{start}.xml" for start in starts]
+    for name in names:
+        yield f"<sitemap><loc>{escape(site_url('/' + name))}</loc></sitemap>\n"
+    yield "</sitemapindex>\n"
+
+
+def stream_sitemap(db):
+    """Single-file sitemap: store pages, categories and every active product."""
+    stmt, render = _product_urls()
+    return _stream(stmt, render, head=_URLSET_HEAD + _page_urls(db), tail=_URLSET_TAIL)
+
+
+def sitemap_pages(db) -> str:
+    return _URLSET_HEAD + _page_urls(db) + _URLSET_TAIL
+
+
+def stream_sitemap_products(start: str):
+    """Up to ``SITEMAP_MAX_URLS`` products in id order, from ``start`` on."""
+    stmt, render = _product_urls(start, SITEMAP_MAX_URLS)
+    return _stream(stmt, render, head=_URLSET_HEAD, tail=_URLSET_TAIL)
@@ -0,0 +1,60 @@
+"""
+Materialized-path index over the category tree.
+
+Each category stores ``path = "/<root id>/.../<own id>/"``. A category and all of its
+descendants are exactly the rows whose path starts with that category's path, so
+"products in Power Tools or any subcategory" is one indexed prefix predicate instead
+of a recursive walk of ``parent_id``.
+"""
+from fastapi import HTTPException
+from sqlalchemy import String, func, literal, select, update
+from sqlalchemy.orm import Session
+from app.models.models import Category, Product, generate_uuid
+
+
+def _path_for(cat: Category, parent: Category = None) -> str:
+    return f"{parent.path if parent else '/'}{cat.id}/"
+
+
+def assign_path(db: Session, cat: Category) -> None:
+    """Set the path of a new category from its parent; call before the first flush."""
+    if not cat.id:
+        cat.id = generate_uuid()
+    parent = db.query(Category).filter(Category.id == cat.parent_id).first() if cat.parent_id else None
+    if cat.parent_id and not parent:
+        raise HTTPException(400, "Parent category not found")
+    cat.path = _path_for(cat, parent)
+
+
+def move_category(db: Session, cat: Category, new_parent_id) -> None:
+    """Re-parent ``cat`` and rewrite the paths of its whole subtree in one UPDATE."""
+    parent = None
+    if new_parent_id:
+        parent = db.query(Category).filter(Category.id == new_parent_id).first()
+        if not parent:
+            raise HTTPException(400, "Parent category not found")
+        if parent.path.startswith(cat.path):
+            raise HTTPException(400, "A category cannot be moved under itself or its subcategories")
+
+    old_path = cat.path
+    new_path = _path_for(cat, parent)
+    cat.parent_id = new_parent_id
+    if new_path == old_path:
+        return
+    db.execute(
+        update(Category)
+        .where(Category.path.startswith(old_path))
+        .values(path=literal(new_path, String) + func.substr(Category.path, len(old_path) + 1, type_=String))
+        .execution_options(synchronize_session=False)
+    )
+    cat.path = new_path
+
+
+def descendant_ids(cat: Category):
+    """Subquery of the ids of ``cat`` and every category below it."""
+    return select(Category.id).where(Category.path.startswith(cat.path))
+
+
+def in_category_subtree(cat: Category):
+    """Product criterion: assigned to ``cat`` or any of its descendants."""
+    return Product.category_id.in_(descendant_ids(cat))
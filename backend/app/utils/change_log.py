@@ -0,0 +1,144 @@
+"""
+Product change sequence for delta sync (``GET /api/products/changes``).
+
+Every committed transaction that touches a product appends one
+``product_changes`` row per product: ``seq`` is a monotonically increasing
+bigint and doubles as the client's change token. Kind is ``upsert`` when the
+product exists and is active at commit, otherwise ``delete`` - a tombstone, so
+hard deletes and deactivations reach sync clients too.
+
+Changes are gathered in ``after_flush`` like the cache and suggest listeners
+(product rows, and image rows on behalf of their product), and written in
+``before_commit``. Set-based writers that bypass the ORM call
+``record_product_changes`` instead.
+
+``seq`` comes from the table's sequence, so writers never wait for each other,
+but on PostgreSQL sequence values can commit out of order. Readers therefore only
+return changes up to a commit-order watermark. Each writer holds a *shared*
+advisory lock from its INSERT to COMMIT. A reader reads ``max(seq)`` and then
+checks ``pg_locks`` for holders of that lock. With none, every row at or below
+the maximum is committed, and rows inserted later get higher values. Only when a
+writer is mid-commit does the reader take the lock *exclusively*, which waits for
+the writers in flight, re-read ``max(seq)`` and release the lock at once. So a
+reader that has seen ``seq = N`` never later finds a newly committed row below
+``N``. Everything runs on the request's own connection; readers don't block each
+other, and checkouts wait for a reader only while it resolves an actual gap.
+
+A client asks for everything after its token. The result is paged on the ``seq``
+primary key, and within a page each product appears once, with its latest change
+(the route serves current state anyway). Pages come back in ``seq`` order, so the
+returned ``next_token`` is always safe to resume from.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import column, event, exists, func, insert, select, table
+from sqlalchemy.orm import Session
+from app.utils.search import is_postgres
+
+# Arbitrary application-wide advisory lock key: shared by writers, exclusive for a reader's watermark
+CHANGE_LOG_LOCK = 7319001
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+
+
+def record_product_changes(db: Session, product_ids):
+    """Queue change rows for products written with Core statements; they are stored on commit."""
+    db.info.setdefault("product_changes", set()).update(product_ids)
+
+
+def _collect(session, flush_context):
+    from app.models.models import Product, ProductImage
+
+    pending = session.info.setdefault("product_changes", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Product):
+            pending.add(obj.id)
+        elif isinstance(obj, ProductImage) and obj.product_id:
+            pending.add(obj.product_id)
+
+
+def _write(session):
+    # before_commit runs ahead of commit's own flush; flush now so _collect sees this transaction's writes
+    session.flush()
+    product_ids = session.info.pop("product_changes", None)
+    if not product_ids:
+        return
+    from app.models.models import Product, ProductChange
+
+    conn = session.connection()
+    active = {
+        product_id for product_id, is_active in conn.execute(
+            select(Product.id, Product.is_active).where(Product.id.in_(product_ids))
+        ) if is_active
+    }
+    if is_postgres(session):
+        # Shared: writers run concurrently; a reader's exclusive barrier waits for them to commit
+        conn.execute(select(func.pg_advisory_xact_lock_shared(CHANGE_LOG_LOCK)))
+    now = datetime.now(timezone.utc)
+    conn.execute(insert(ProductChange), [
+        {"product_id": product_id, "kind": CHANGE_UPSERT if product_id in active else CHANGE_DELETE, "changed_at": now}
+        for product_id in sorted(product_ids)
+    ])
+
+
+def _discard(session):
+    session.info.pop("product_changes", None)
+
+
+def _watermark(db: Session):
+    """Highest ``seq`` below which every change is committed (PostgreSQL), else None."""
+    if not is_postgres(db):
+        return None
+    from app.models.models import ProductChange
+
+    latest = select(func.max(ProductChange.seq))
+    watermark = db.execute(latest).scalar() or 0
+    if not db.execute(select(_writers_in_flight())).scalar():
+        return watermark
+    # A writer is between INSERT and COMMIT: wait for it behind an exclusive session lock,
+    # released right away (an xact lock would block writers for the rest of this request)
+    db.execute(select(func.pg_advisory_lock(CHANGE_LOG_LOCK)))
+    try:
+        return db.execute(latest).scalar() or 0
+    finally:
+        db.execute(select(func.pg_advisory_unlock(CHANGE_LOG_LOCK)))
+
+
+def _writers_in_flight():
+    """True while some transaction holds the writers' shared lock (int8 keys: classid/objid halves, objsubid 1)."""
+    pg_locks = table(
+        "pg_locks", column("locktype"), column("database"), column("classid"),
+        column("objid"), column("objsubid"), column("granted"),
+    )
+    pg_database = table("pg_database", column("oid"), column("datname"))
+    this_database = select(pg_database.c.oid).where(pg_database.c.datname == func.current_database())
+    return exists().where(
+        pg_locks.c.locktype == "advisory",
+        pg_locks.c.database == this_database.scalar_subquery(),
+        pg_locks.c.classid == CHANGE_LOG_LOCK >> 32,
+        pg_locks.c.objid == CHANGE_LOG_LOCK & 0xFFFFFFFF,
+        pg_locks.c.objsubid == 1,
+        pg_locks.c.granted,
+    )
+
+
+def latest_changes(db: Session, since: int, limit: int):
+    """One page of changes after ``since`` as ``(rows, has_more)``: up to ``limit`` changes by ``seq``,
+    keeping only each product's latest within the page, in ``seq`` order."""
+    from app.models.models import ProductChange
+
+    stmt = select(ProductChange.seq, ProductChange.product_id, ProductChange.kind).where(ProductChange.seq > since)
+    watermark = _watermark(db)
+    if watermark is not None:
+        stmt = stmt.where(ProductChange.seq <= watermark)
+    page = db.execute(stmt.order_by(ProductChange.seq).limit(limit + 1)).all()
+    has_more = len(page) > limit
+    latest = {}
+    for row in page[:limit]:
+        latest[row.product_id] = row  # later rows supersede earlier ones
+    return sorted(latest.values(), key=lambda row: row.seq), has_more
+
+
+def register_change_log(session_factory):
+    event.listen(session_factory, "after_flush", _collect)
+    event.listen(session_factory, "before_commit", _write)
+    event.listen(session_factory, "after_rollback", _discard)
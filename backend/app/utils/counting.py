@@ -0,0 +1,99 @@
+"""
+Count strategies for paginated listings.
+
+An exact ``COUNT(*)`` has to visit every matching row, which dominates the cost
+of an unfiltered admin list once a table is large. ``count_total`` first asks the
+PostgreSQL planner for its row estimate (``EXPLAIN``, no rows touched):
+
+* estimate at or below ``COUNT_EXACT_LIMIT``: the exact count is cheap, so run it.
+* estimate above it: apply ``COUNT_LARGE_STRATEGY``:
+    ``cached``   exact count, reused for ``COUNT_CACHE_TTL_SECONDS`` per query
+                 (reported as not exact while served from the cache);
+    ``estimate`` the planner estimate itself;
+    ``exact``    always count.
+
+Other databases have no cheap estimate and always get the exact count. Callers
+return the second element of the result so clients can show "about N".
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.config import settings
+
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def planner_estimate(db: Session, query: Query):
+    """Planner row estimate for ``query``, or None when the database cannot provide one."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    plan = db.execute(_Explain(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class _CountCache:
+    """Small in-process TTL map: compiled query -> count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, count: int, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, count)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+count_cache = _CountCache(COUNT_CACHE_MAX_ENTRIES)
+
+
+def _cache_key(db: Session, query: Query) -> str:
+    compiled = query.statement.compile(dialect=db.get_bind().dialect)
+    return f"{compiled}|{sorted(compiled.params.items(), key=lambda kv: kv[0])!r}"
+
+
+def count_total(db: Session, query: Query) -> tuple:
+    """Return ``(total, exact)`` for the rows ``query`` would return (eager loads and ORDER BY ignored)."""
+    query = query.enable_eagerloads(False).order_by(None)
+    estimate = planner_estimate(db, query)
+    if estimate is None or estimate <= settings.COUNT_EXACT_LIMIT or settings.COUNT_LARGE_STRATEGY == "exact":
+        return query.count(), True
+    if settings.COUNT_LARGE_STRATEGY == "estimate":
+        return estimate, False
+
+    key = _cache_key(db, query)
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached, False
+    total = query.count()
+    count_cache.set(key, total, settings.COUNT_CACHE_TTL_SECONDS)
+    return total, True
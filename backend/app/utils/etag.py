@@ -0,0 +1,36 @@
+"""
+Strong ETags and ``If-None-Match`` handling.
+
+Catalog responses are tagged with a hash of their cached JSON bytes, which is computed
+once when the entry is built, so a revalidation hit does no serialization and no
+hashing. Other reads derive the tag from version columns (``updated_at``) with a
+one-row query, before loading or serializing anything.
+"""
+import hashlib
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Quoted strong ETag from a payload (bytes) or version values."""
+    data = parts[0] if len(parts) == 1 and isinstance(parts[0], bytes) else "|".join(map(str, parts)).encode()
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    return etag in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def tag_response(response: Response, etag: str) -> None:
+    """Attach ``etag``; ``no-cache`` makes browsers revalidate instead of reusing stale copies."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -0,0 +1,65 @@
+"""
+Facet counts for the product listing.
+
+All facets are computed in one round trip: a UNION ALL of one GROUP BY per facet.
+Each branch applies every active filter except its own, so selecting a brand still
+shows how many results the other brands would give (disjunctive faceting).
+"""
+from sqlalchemy import String, case, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+from app.models.models import Product, Category
+
+# Price bucket lower bounds (INR); the last bucket is open-ended.
+PRICE_BUCKETS = [0, 250, 500, 1000, 2500, 5000]
+
+
+def _criteria(filters: dict, exclude: str):
+    return [c for group, criteria in filters.items() if group != exclude for c in criteria]
+
+
+def _price_bucket():
+    whens = [(Product.price >= lower, i) for i, lower in reversed(list(enumerate(PRICE_BUCKETS)))]
+    return case(*whens, else_=0)
+
+
+def product_facets(db: Session, filters: dict) -> dict:
+    """Brand, category and price-range counts for the listing ``filters``.
+
+    ``filters`` maps a facet name (``"brand"``, ``"category"``, ``"price"``) or any other
+    group (e.g. ``"base"``) to a list of WHERE criteria on ``Product``.
+    """
+    count = func.count(Product.id)
+
+    brands = (
+        select(literal("brand"), Product.brand, Product.brand, count)
+        .where(Product.brand != "", *_criteria(filters, "brand"))
+        .group_by(Product.brand)
+    )
+    categories = (
+        select(literal("category"), Category.slug, Category.name, count)
+        .join(Category, Product.category_id == Category.id)
+        .where(*_criteria(filters, "category"))
+        .group_by(Category.slug, Category.name)
+    )
+    bucket = _price_bucket()
+    prices = (
+        select(literal("price"), cast(bucket, String), literal(""), count)
+        .where(*_criteria(filters, "price"))
+        .group_by(bucket)
+    )
+
+    result = {"brands": [], "categories": [], "price_ranges": []}
+    for facet, value, label, n in db.execute(union_all(brands, categories, prices)):
+        if facet == "brand":
+            result["brands"].append({"value": value, "label": label, "count": n})
+        elif facet == "category":
+            result["categories"].append({"value": value, "label": label, "count": n})
+        else:
+            i = int(value)
+            upper = PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None
+            result["price_ranges"].append({"min": PRICE_BUCKETS[i], "max": upper, "count": n})
+
+    result["brands"].sort(key=lambda f: (-f["count"], f["value"]))
+    result["categories"].sort(key=lambda f: (-f["count"], f["value"]))
+    result["price_ranges"].sort(key=lambda f: f["min"])
+    return result
@@ -0,0 +1,139 @@
+"""
+Idempotency-Key support for POSTs that create orders, invoices and payments.
+
+A client that may retry sends ``Idempotency-Key: <unique string>``. ``idempotent``
+claims the key (per user) by inserting an ``in_progress`` row through the request's
+own session, before the handler runs. Handlers only flush; once one returns, its
+serialized response is stored on the row and ``idempotent`` commits the work, the
+key and the outcome in a single transaction. A key is therefore never committed
+without its outcome, and disappears if the handler fails and rolls back.
+
+A repeat with the same key:
+
+* hits the unique index on ``(user_id, key)``. While the first request's transaction
+  is open, PostgreSQL makes the duplicate INSERT wait for it, so concurrent
+  duplicates queue behind the first request instead of running the work again;
+* then replays the stored status and body (with ``Idempotent-Replayed: true``), after
+  polling up to ``IDEMPOTENCY_WAIT_SECONDS`` if the first request has not committed
+  yet. A 409 after that wait means it is still running; retrying later is safe;
+* claims the key afresh and runs the handler if the row is gone by the time it
+  looks: the first request failed and rolled back, so nothing ran and nothing is
+  running;
+* gets a 422 if the body differs from the first request (the fingerprint is a hash
+  of method, path and request body).
+
+Keys live for ``IDEMPOTENCY_TTL_SECONDS``. Expired rows are purged by a background
+thread with a range delete on the indexed ``expires_at`` column.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+POLL_INTERVAL_SECONDS = 0.1
+PURGE_INTERVAL_SECONDS = 3600
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprint(request: Request, payload: BaseModel) -> str:
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{request.method} {request.url.path}\n{body}".encode("utf-8")).hexdigest()
+
+
+def _replay(row: IdempotencyKey) -> Response:
+    return Response(
+        row.response_body, status_code=row.response_status, media_type="application/json",
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def _await_outcome(db: Session, user_id: str, key: str, fingerprint: str):
+    """Replay the committed outcome for ``key``; None if the key is free again (its claim rolled back)."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        row = db.query(IdempotencyKey).filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key).first()
+        if row is None:
+            return None
+        if row.fingerprint != fingerprint:
+            raise HTTPException(422, "Idempotency-Key was already used for a different request")
+        if row.status == "completed":
+            return _replay(row)
+        if time.monotonic() >= deadline:
+            raise HTTPException(409, "A request with this Idempotency-Key is still being processed")
+        db.rollback()  # end the snapshot so the next poll sees new commits
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def idempotent(request: Request, db: Session, user_id: str, payload: BaseModel, response_model, handler):
+    """Run ``handler()`` at most once per ``Idempotency-Key`` and commit its work.
+
+    ``handler`` must flush, not commit. Without the header it is simply run and committed.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        result = response_model.model_validate(handler())
+        db.commit()
+        return result
+    if len(key) > 255:
+        raise HTTPException(400, "Idempotency-Key must be at most 255 characters")
+
+    fingerprint = _fingerprint(request, payload)
+    while True:
+        claim = IdempotencyKey(
+            user_id=user_id, key=key, fingerprint=fingerprint,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+        )
+        db.add(claim)
+        try:
+            db.flush()
+            break
+        except IntegrityError:
+            db.rollback()
+        replay = _await_outcome(db, user_id, key, fingerprint)
+        if replay is not None:
+            return replay
+        # The claim we collided with rolled back; take the key ourselves
+
+    body = json.dumps(jsonable_encoder(response_model.model_validate(handler()))).encode("utf-8")
+    # Record the outcome before the one commit, so the claim never lands without it
+    claim.status = "completed"
+    claim.response_status = 200
+    claim.response_body = body.decode("utf-8")
+    db.commit()
+    return Response(body, media_type="application/json")
+
+
+def purge_expired_keys(db: Session) -> int:
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(timezone.utc)))
+    db.commit()
+    return result.rowcount
+
+
+def _purge_forever(session_factory):
+    while True:
+        time.sleep(PURGE_INTERVAL_SECONDS)
+        db = session_factory()
+        try:
+            purge_expired_keys(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Idempotency key purge failed")
+        finally:
+            db.close()
+
+
+def start_idempotency_purger(session_factory):
+    threading.Thread(target=_purge_forever, args=(session_factory,), daemon=True).start()
@@ -0,0 +1,161 @@
+"""
+On-the-fly image resizing for ``/uploads/<file>?w=<width>``.
+
+``ResizingStaticFiles`` replaces the plain ``/uploads`` mount: requests without ``w``
+are served exactly as before, image requests with ``w`` get a resized copy. Resizes
+run in the image worker processes and land in ``IMAGE_CACHE_DIR``, which is kept under
+``IMAGE_CACHE_MAX_BYTES`` by evicting the least recently served files. Concurrent
+misses for the same (file, width, format) share one render, so a hot new product
+doesn't start dozens of identical resizes. A source Pillow cannot read (corrupt or
+legacy uploads) is served unresized instead of failing the request.
+
+Each API worker process keeps its own byte count, seeded from the directory at
+first use, so with N workers the directory can grow to roughly
+N x ``IMAGE_CACHE_MAX_BYTES``; size the cap accordingly.
+"""
+import asyncio
+import os
+import stat
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs
+import anyio
+from fastapi.responses import PlainTextResponse
+from PIL import Image, UnidentifiedImageError
+from starlette.staticfiles import StaticFiles
+from app.config import settings
+from app.utils.images import RESIZABLE_EXTENSIONS, VARIANT_FORMATS, image_pool, render_width
+
+MIN_WIDTH, MAX_WIDTH = 16, 2400
+# Requested widths are rounded up to a multiple of this to bound the number of cached copies
+WIDTH_STEP = 16
+
+
+def snap_width(width: int) -> int:
+    width = min(max(width, MIN_WIDTH), MAX_WIDTH)
+    return -(-width // WIDTH_STEP) * WIDTH_STEP
+
+
+class DiskCache:
+    """Byte-bounded LRU over the files in ``directory``; recency and size are tracked in memory, per process."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._files = None  # OrderedDict name -> size, least recent first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                entries.append((st.st_atime, entry.name, st.st_size))
+        self._files = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self._bytes = sum(self._files.values())
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def touch(self, name: str) -> bool:
+        """Mark ``name`` as just used; False if it is not (or no longer) cached."""
+        with self._lock:
+            if self._files is None:
+                self._load()
+            if name not in self._files:
+                return False
+            if not os.path.exists(self.path(name)):  # evicted by another worker
+                self._bytes -= self._files.pop(name)
+                return False
+            self._files.move_to_end(name)
+            return True
+
+    def add(self, name: str):
+        with self._lock:
+            if self._files is None:
+                self._load()
+            size = os.path.getsize(self.path(name))
+            self._bytes += size - self._files.pop(name, 0)
+            self._files[name] = size
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                oldest, oldest_size = self._files.popitem(last=False)
+                self._bytes -= oldest_size
+                try:
+                    os.remove(self.path(oldest))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self._files is None:
+                self._load()
+            return {"files": len(self._files), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+resize_cache = DiskCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
+_in_flight = {}  # cache name -> Task rendering it
+
+
+async def _render(name: str, source_path: str, width: int, fmt: str) -> str:
+    try:
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(image_pool(), render_width, source_path, resize_cache.path(name), width, fmt)
+        await anyio.to_thread.run_sync(resize_cache.add, name)
+        return path
+    finally:
+        _in_flight.pop(name, None)
+
+
+async def resized_image(source_path: str, width: int, fmt: str) -> str:
+    """Path of ``source_path`` resized to ``width`` as ``fmt``, rendering it once on a miss."""
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    name = f"{stem}-w{width}{VARIANT_FORMATS[fmt][1]}"
+    if await anyio.to_thread.run_sync(resize_cache.touch, name):
+        return resize_cache.path(name)
+
+    task = _in_flight.get(name)
+    if task is None:
+        task = _in_flight[name] = asyncio.ensure_future(_render(name, source_path, width, fmt))
+    # Shielded: one client disconnecting must not cancel the render others are waiting on
+    return await asyncio.shield(task)
+
+
+class ResizingStaticFiles(StaticFiles):
+    """``StaticFiles`` that serves ``?w=<width>[&format=webp|jpeg]`` image requests from the resize cache."""
+
+    async def get_response(self, path: str, scope):
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if "w" not in query or os.path.splitext(path)[1].lower() not in RESIZABLE_EXTENSIONS:
+            return await super().get_response(path, scope)
+        try:
+            width = snap_width(int(query["w"][0]))
+        except ValueError:
+            return PlainTextResponse("Invalid width", status_code=400)
+        fmt = query.get("format", [None])[0]
+        if fmt is None:
+            accept = dict(scope.get("headers", [])).get(b"accept", b"")
+            fmt = "webp" if b"image/webp" in accept else "jpeg"
+        if fmt not in VARIANT_FORMATS:
+            return PlainTextResponse("Invalid format. Use webp or jpeg", status_code=400)
+
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return await super().get_response(path, scope)  # the usual 404
+
+        for _ in range(2):  # a copy evicted by another worker between lookup and stat is rendered again
+            try:
+                cached = await resized_image(full_path, width, fmt)
+                cached_stat = await anyio.to_thread.run_sync(os.stat, cached)
+                break
+            except FileNotFoundError:
+                continue
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+                return await super().get_response(path, scope)  # not resizable: serve the original
+        else:
+            return await super().get_response(path, scope)
+        response = self.file_response(cached, cached_stat, scope)
+        response.headers["Cache-Control"] = "public, max-age=86400"
+        response.headers["Vary"] = "Accept"
+        return response
@@ -0,0 +1,96 @@
+"""
+Resized variants of uploaded images.
+
+Every raster upload is handed to a process pool (Pillow work is CPU-bound and would
+stall the event loop) which writes fixed-size variants (``IMAGE_VARIANTS``) in WebP
+and JPEG next to the original, as ``<stem>-<size>.webp`` / ``<stem>-<size>.jpg``,
+plus a ``<stem>.variants.json`` sidecar with the map. Attaching the upload to a
+product copies that map onto ``ProductImage.variants``.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+from app.config import settings
+
+# size name -> longest edge in pixels (never upscaled)
+IMAGE_VARIANTS = {"thumb": 200, "medium": 600, "large": 1200}
+# format key -> (Pillow format, extension, save options)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+RESIZABLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+_pool = None
+
+
+def image_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _pool
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """JPEG has no alpha channel: composite transparent images onto white."""
+    if img.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def render_variants(path: str, url_prefix: str = "/uploads") -> dict:
+    """Write every variant of the image at ``path`` and return the variant map. Runs in a worker process."""
+    stem = os.path.splitext(path)[0]
+    url_stem = f"{url_prefix}/{os.path.basename(stem)}"
+    with Image.open(path) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ("RGB", "RGBA"):
+            source = source.convert("RGBA" if "transparency" in source.info or source.mode in ("LA", "PA") else "RGB")
+
+        variants = {}
+        for size, edge in IMAGE_VARIANTS.items():
+            img = source.copy()
+            img.thumbnail((edge, edge), Image.LANCZOS)
+            entry = {"width": img.width, "height": img.height}
+            for key, (pil_format, ext, options) in VARIANT_FORMATS.items():
+                out = img if pil_format == "WEBP" or img.mode == "RGB" else _flatten(img)
+                out.save(f"{stem}-{size}{ext}", pil_format, **options)
+                entry[key] = f"{url_stem}-{size}{ext}"
+            variants[size] = entry
+
+    with open(f"{stem}.variants.json", "w") as f:
+        json.dump(variants, f)
+    return variants
+
+
+def render_width(path: str, dest: str, width: int, fmt: str) -> str:
+    """Write ``path`` scaled to at most ``width`` px wide as ``fmt`` (a VARIANT_FORMATS key). Runs in a worker process."""
+    pil_format, _, options = VARIANT_FORMATS[fmt]
+    with Image.open(path) as source:
+        img = ImageOps.exif_transpose(source)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        if pil_format != "WEBP" and img.mode != "RGB":
+            img = _flatten(img)
+        # Write beside the target and rename, so readers never see a half-written file
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        img.save(tmp, pil_format, **options)
+    os.replace(tmp, dest)
+    return dest
+
+
+def load_variants(image_url: str) -> dict:
+    """Variant map of a stored upload (empty for external URLs or files without variants)."""
+    if not image_url or not image_url.startswith("/uploads/"):
+        return {}
+    stem = os.path.splitext(image_url[len("/uploads/"):])[0]
+    try:
+        with open(os.path.join(settings.UPLOAD_DIR, f"{stem}.variants.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
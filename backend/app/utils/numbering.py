@@ -0,0 +1,118 @@
+"""
+Document numbers for web orders, sales invoices, purchase orders, GRNs and payments.
+
+Each series counts per fiscal year in one ``document_sequences`` row
+``(series, fiscal_year) -> next_value``. Numbers read ``<prefix>-<fy>-<counter>``,
+e.g. ``INV-2627-00042`` for the 42nd sales invoice of FY 2026-27. Prefixes come from
+``DOCUMENT_NUMBER_PREFIXES``, and the year turns over on ``FISCAL_YEAR_START_MONTH``,
+so every series restarts at 1 each fiscal year. Numbers are always allocated by a
+single atomic ``UPDATE ... RETURNING`` on that row, never by reading the highest
+existing number, so two requests can never be given the same one.
+
+* Gapless series (sales invoices: GST wants consecutive invoice serials per fiscal
+  year, at most 16 characters) take their number inside the caller's transaction. The
+  row stays locked until that transaction ends, and a rollback hands the number back.
+  Invoices are therefore numbered one at a time; callers allocate as late as they can.
+* The other series reserve ``DOCUMENT_NUMBER_BLOCK_SIZE`` numbers at a time in a
+  short transaction of their own, and each worker process hands them out from memory.
+  The counter row is touched once per block instead of once per document, so it
+  never becomes a hot row. The cost is gaps: a rolled back document, or a worker that
+  stops with part of a block unused, skips those numbers. Within a year numbers
+  still increase per worker, but not strictly across workers.
+
+Block allocation needs a second connection while the caller's transaction is
+open, so it is used on PostgreSQL only. SQLite serializes writers anyway, and
+there every series takes its number in the caller's transaction.
+
+Users may still type a number by hand, and a manual number can match the series
+format. ``next_number`` therefore skips any number that is already used in the
+document's table. The counter moves past it, so one manual entry never blocks the
+series, and a gapless series stays consecutive: the skipped serial belongs to the
+manual document.
+"""
+import threading
+from datetime import date
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.models import DocumentSequence, Order, SalesInvoice, PurchaseOrder, GoodsReceivedNote, Payment
+from app.utils.search import is_postgres
+
+# series -> (number column, counter digits, gapless)
+SERIES = {
+    "order": (Order.order_number, 6, False),
+    "sales_invoice": (SalesInvoice.invoice_number, 5, True),
+    "purchase_order": (PurchaseOrder.po_number, 5, False),
+    "grn": (GoodsReceivedNote.grn_number, 5, False),
+    "payment": (Payment.payment_number, 5, False),
+}
+
+
+def fiscal_year(day: date) -> int:
+    """Calendar year in which the fiscal year containing ``day`` starts."""
+    return day.year if day.month >= settings.FISCAL_YEAR_START_MONTH else day.year - 1
+
+
+def _fiscal_label(year: int) -> str:
+    if settings.FISCAL_YEAR_START_MONTH == 1:
+        return f"{year % 100:02d}"
+    return f"{year % 100:02d}{(year + 1) % 100:02d}"
+
+
+def _advance(conn, series: str, year: int, count: int) -> int:
+    """Move the counter on by ``count``; returns the first of the numbers taken."""
+    stmt = (
+        update(DocumentSequence)
+        .where(DocumentSequence.series == series, DocumentSequence.fiscal_year == year)
+        .values(next_value=DocumentSequence.next_value + count)
+        .returning(DocumentSequence.next_value)
+    )
+    row = conn.execute(stmt).first()
+    if row is None:
+        # First number of the year for this series; a concurrent creator wins harmlessly
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(DocumentSequence).values(series=series, fiscal_year=year, next_value=1))
+        except IntegrityError:
+            pass
+        row = conn.execute(stmt).first()
+    return row[0] - count
+
+
+class _Blocks:
+    """Per-process ranges of reserved numbers: (series, fiscal year) -> [next, end)."""
+
+    def __init__(self):
+        self._ranges = {}
+        self._lock = threading.Lock()
+
+    def take(self, engine, series: str, year: int) -> int:
+        with self._lock:
+            start, end = self._ranges.get((series, year), (0, 0))
+            if start >= end:
+                size = settings.DOCUMENT_NUMBER_BLOCK_SIZE
+                with engine.begin() as conn:
+                    start = _advance(conn, series, year, size)
+                end = start + size
+            self._ranges[(series, year)] = (start + 1, end)
+            return start
+
+
+blocks = _Blocks()
+
+
+def next_number(db: Session, series: str, day: date = None) -> str:
+    """Allocate the next number of ``series`` for the fiscal year of ``day`` (default today)."""
+    column, width, gapless = SERIES[series]
+    year = fiscal_year(day or date.today())
+    prefix = settings.DOCUMENT_NUMBER_PREFIXES[series]
+    while True:
+        if gapless or not is_postgres(db):
+            value = _advance(db.connection(), series, year, 1)
+        else:
+            value = blocks.take(db.get_bind(), series, year)
+        number = f"{prefix}-{_fiscal_label(year)}-{value:0{width}d}"
+        # Skip a number someone already entered by hand
+        if db.query(column).filter(column == number).first() is None:
+            return number
@@ -0,0 +1,138 @@
+"""
+Transactional outbox for side effects of orders, invoices and payments.
+
+Routes never send email/SMS or feed analytics themselves. They call ``publish``,
+which adds one ``outbox_events`` row per consumer subscribed to the topic, in the
+route's own transaction: an event exists exactly when the order, invoice or payment
+it describes was committed. The worker (``python scripts/outbox_worker.py``) drains
+due rows in batches and hands each payload to its consumer:
+
+* rows are picked off the ``(status, available_at)`` index with
+  ``FOR UPDATE SKIP LOCKED``, so several workers can run side by side;
+* one row per consumer means a failing consumer is retried on its own. It never
+  makes the others run again;
+* a failure is retried after ``OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)``
+  (capped at ``OUTBOX_BACKOFF_MAX_SECONDS``, with jitter). After
+  ``OUTBOX_MAX_ATTEMPTS`` tries the row is parked as ``failed`` with its last error;
+* processed rows are deleted after ``OUTBOX_RETENTION_DAYS``.
+
+Delivery is at least once: a worker that dies between running a consumer and
+committing runs it again, so consumers must tolerate repeats.
+
+Topics: ``order.placed``, ``order.status_changed``, ``sales_invoice.created`` and
+``payment.created``. Until real email/SMS and analytics providers are wired in, the
+consumers registered here are local stand-ins that log what they would send.
+Catalog cache invalidation stays in the request path: the in-memory cache lives in
+the API process, which the worker cannot reach.
+"""
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.models import OutboxEvent
+
+PURGE_INTERVAL_SECONDS = 3600
+
+logger = logging.getLogger(__name__)
+
+# consumer name -> (topics, handler(topic, payload))
+CONSUMERS = {}
+
+
+def consumer(name: str, *topics: str):
+    """Register ``handler(topic, payload)`` as consumer ``name`` of ``topics``."""
+    def register(handler):
+        CONSUMERS[name] = (set(topics), handler)
+        return handler
+    return register
+
+
+def publish(db: Session, topic: str, payload: dict):
+    """Queue ``payload`` for every consumer of ``topic``; it is stored when the caller commits."""
+    body = json.dumps(payload, default=str)
+    for name, (topics, _) in sorted(CONSUMERS.items()):
+        if topic in topics:
+            db.add(OutboxEvent(topic=topic, consumer=name, payload=body))
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def _deliver(event: OutboxEvent, now: datetime):
+    try:
+        if event.consumer not in CONSUMERS:
+            raise LookupError(f"No outbox consumer named {event.consumer!r}")
+        CONSUMERS[event.consumer][1](event.topic, json.loads(event.payload))
+    except Exception as exc:
+        event.attempts += 1
+        event.last_error = repr(exc)[:2000]
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.status = "failed"
+            logger.error("Outbox event %s (%s -> %s) failed for good: %s", event.id, event.topic, event.consumer, exc)
+        else:
+            event.available_at = now + _backoff(event.attempts)
+        return
+    event.status = "done"
+    event.processed_at = now
+
+
+def drain_outbox(db: Session) -> int:
+    """Deliver one batch of due events and commit; returns how many were picked up."""
+    now = datetime.now(timezone.utc)
+    batch = (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.available_at)
+        .limit(settings.OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for event in batch:
+        _deliver(event, now)
+    db.commit()
+    return len(batch)
+
+
+def purge_processed(db: Session) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    result = db.execute(delete(OutboxEvent).where(OutboxEvent.status == "done", OutboxEvent.processed_at <= cutoff))
+    db.commit()
+    return result.rowcount
+
+
+def run_worker(session_factory):
+    """Drain the outbox forever: full batches back to back, then poll every ``OUTBOX_POLL_SECONDS``."""
+    last_purge = 0.0
+    while True:
+        db = session_factory()
+        try:
+            while drain_outbox(db) >= settings.OUTBOX_BATCH_SIZE:
+                pass
+            if time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+                purge_processed(db)
+                last_purge = time.monotonic()
+        except Exception:
+            db.rollback()
+            logger.exception("Outbox drain failed")
+        finally:
+            db.close()
+        time.sleep(settings.OUTBOX_POLL_SECONDS)
+
+
+# ─── Local stand-ins ────────────────────────────────────
+
+@consumer("notifications", "order.placed", "order.status_changed")
+def _notify_customer(topic: str, payload: dict):
+    logger.info("Would notify %s (%s) of %s for order %s",
+                payload.get("email"), payload.get("phone"), topic, payload.get("order_number"))
+
+
+@consumer("analytics", "order.placed", "order.status_changed", "sales_invoice.created", "payment.created")
+def _track(topic: str, payload: dict):
+    logger.info("Analytics event %s: %s", topic, payload)
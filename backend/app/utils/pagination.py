@@ -0,0 +1,46 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token holding the sort key of the last row served.
+The next page continues with ``(sort_col, id) > (last_value, last_id)`` (or ``<`` for
+descending sorts), which an index on ``(sort_col, id)`` answers without walking the
+skipped rows the way ``OFFSET`` does.
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort: str, value, row_id: str) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    raw = json.dumps([sort, value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, parse=str):
+    """Return ``(value, row_id)`` from a cursor issued for ``sort``; 400 on anything else.
+
+    ``parse`` converts the stored value back to the column's Python type
+    (e.g. ``datetime.fromisoformat`` or ``Decimal``).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        value = parse(value)
+    except (ValueError, TypeError, ArithmeticError):
+        raise HTTPException(400, "Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(400, "Cursor does not match the requested sort")
+    return value, row_id
+
+
+def keyset_filter(column, id_column, value, row_id, descending: bool):
+    """Row-value comparison selecting rows strictly after ``(value, row_id)`` in sort order."""
+    key = tuple_(column, id_column)
+    return key < tuple_(value, row_id) if descending else key > tuple_(value, row_id)
@@ -0,0 +1,211 @@
+"""
+Streaming bulk product import from CSV or JSON Lines, upserting by SKU.
+
+The upload is read line by line from the spooled temporary file the multipart parser
+already wrote, so a 50k-line supplier catalog is never held in memory. Rows are
+validated and written ``IMPORT_CHUNK_SIZE`` at a time: one SELECT looks up existing
+SKUs and slug clashes for the whole chunk, new products go in with one batched
+INSERT, existing ones get one batched UPDATE by primary key, and the chunk is
+committed. Invalid rows are skipped and reported with their line number; a chunk the
+database rejects is rolled back and its rows are reported as failed.
+"""
+import csv
+import io
+import json
+import re
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.models.models import Product, Category, generate_uuid
+from app.schemas.schemas import ProductCreate, ProductImportRow
+from app.utils.cache import catalog_cache, PRODUCT_LIST, PRODUCT_DETAIL, CATEGORIES
+from app.utils.search import refresh_search_vectors
+from app.utils.suggest import suggest_index
+from app.utils.change_log import record_product_changes
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# Column values for new products that the file leaves out (same defaults as POST /api/products)
+NEW_PRODUCT_DEFAULTS = {
+    name: field.default for name, field in ProductCreate.model_fields.items() if not field.is_required()
+}
+_REQUIRED = ("name", "slug", "price")
+
+
+def import_format(filename: str, requested: str = None) -> str:
+    fmt = requested or IMPORT_FORMATS.get(("." + (filename or "").rsplit(".", 1)[-1]).lower())
+    if fmt not in ("csv", "jsonl"):
+        raise HTTPException(400, "Unsupported import format. Use csv or jsonl")
+    return fmt
+
+
+def _slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _read_rows(file, fmt: str):
+    """Yield ``(line_number, record, error)`` without reading the whole file."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            # Empty cells mean "not provided", so a partial sheet doesn't blank existing values
+            yield reader.line_num, {
+                k.strip(): v.strip() for k, v in record.items() if k and isinstance(v, str) and v.strip()
+            }, None
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in exc.errors())
+
+
+class _Import:
+    def __init__(self, db: Session):
+        self.db = db
+        self.categories = dict(db.query(Category.slug, Category.id))
+        self.category_ids = set(self.categories.values())
+        self.seen_skus = set()
+        self.seen_slugs = set()
+        self.total_rows = self.created = self.updated = 0
+        self.errors = []
+
+    def fail(self, line_number: int, sku, error: str):
+        self.errors.append({"row": line_number, "sku": sku, "error": error})
+
+    def write_chunk(self, chunk):
+        db = self.db
+        skus = {row.sku for _, row in chunk}
+        slugs = {row.slug or _slugify(row.name or "") for _, row in chunk} - {""}
+        by_sku, slug_owner = {}, {}
+        for product_id, sku, slug in db.execute(
+            select(Product.id, Product.sku, Product.slug).where(or_(Product.sku.in_(skus), Product.slug.in_(slugs)))
+        ):
+            by_sku[sku] = product_id
+            slug_owner[slug] = sku
+
+        inserts, updates, written = [], [], []
+        matched = 0
+        for line_number, row in chunk:
+            sku = row.sku
+            if sku in self.seen_skus:
+                self.fail(line_number, sku, "SKU appears earlier in the file")
+                continue
+            self.seen_skus.add(sku)
+
+            values = row.model_dump(exclude_unset=True, exclude={"sku", "category"})
+            if row.category:
+                if row.category not in self.categories:
+                    self.fail(line_number, sku, f"Unknown category '{row.category}'")
+                    continue
+                values["category_id"] = self.categories[row.category]
+            elif values.get("category_id") and values["category_id"] not in self.category_ids:
+                self.fail(line_number, sku, "Unknown category_id")
+                continue
+            empty = [f for f in _REQUIRED if f in values and values[f] is None]
+            if empty:
+                self.fail(line_number, sku, f"{', '.join(empty)} cannot be empty")
+                continue
+
+            product_id = by_sku.get(sku)
+            if product_id is None:
+                if not values.get("name") or values.get("price") is None:
+                    self.fail(line_number, sku, "New products need name and price")
+                    continue
+                values["slug"] = values.get("slug") or _slugify(values["name"])
+            slug = values.get("slug")
+            if slug and (slug in self.seen_slugs or slug_owner.get(slug, sku) != sku):
+                self.fail(line_number, sku, "Slug already exists")
+                continue
+            if slug:
+                self.seen_slugs.add(slug)
+
+            if product_id is None:
+                inserts.append({**NEW_PRODUCT_DEFAULTS, **values, "id": generate_uuid(), "sku": sku})
+            else:
+                values.pop("stock", None)  # stock changes go through inventory so they are logged
+                matched += 1
+                if values:
+                    updates.append({"id": product_id, **values})
+            written.append((line_number, sku))
+
+        try:
+            if inserts:
+                db.execute(insert(Product), inserts)
+            if updates:
+                db.execute(update(Product), updates)
+            refresh_search_vectors(db, [r["id"] for r in inserts + updates])
+            record_product_changes(db, [r["id"] for r in inserts + updates])
+            db.commit()
+        except SQLAlchemyError as exc:
+            db.rollback()
+            if isinstance(exc, IntegrityError):
+                error = "Conflicts with a concurrent change; import this row again"
+            else:
+                # e.g. DataError for a value the column cannot hold; the whole chunk was rolled back
+                reason = str(getattr(exc, "orig", None) or exc).splitlines()[0]
+                error = f"Database rejected the chunk containing this row: {reason}"
+            for line_number, sku in written:
+                self.fail(line_number, sku, error)
+            return
+        self.created += len(inserts)
+        self.updated += matched
+
+    def run(self, rows):
+        chunk = []
+        for line_number, record, error in rows:
+            self.total_rows += 1
+            if error:
+                self.fail(line_number, None, error)
+                continue
+            try:
+                row = ProductImportRow.model_validate(record)
+            except ValidationError as exc:
+                self.fail(line_number, record.get("sku"), _validation_message(exc))
+                continue
+            row.sku = row.sku.strip().upper()
+            if not row.sku:
+                self.fail(line_number, None, "sku: cannot be empty")
+                continue
+            chunk.append((line_number, row))
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                self.write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(chunk)
+
+
+def import_products(db: Session, file, fmt: str) -> dict:
+    """Create or update products from a CSV/JSONL file object; returns counts and per-row errors."""
+    job = _Import(db)
+    job.run(_read_rows(file, fmt))
+
+    if job.created or job.updated:
+        # Batched statements bypass the ORM events that normally keep these in step
+        for namespace in (PRODUCT_LIST, PRODUCT_DETAIL, CATEGORIES):
+            catalog_cache.invalidate(namespace)
+        suggest_index.mark_stale()
+
+    job.errors.sort(key=lambda e: e["row"])
+    return {
+        "total_rows": job.total_rows,
+        "created": job.created,
+        "updated": job.updated,
+        "failed": len(job.errors),
+        "errors": job.errors,
+    }
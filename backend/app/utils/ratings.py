@@ -0,0 +1,23 @@
+"""
+Denormalized review aggregates on ``Product``.
+
+``rating_count``/``rating_sum`` cover approved reviews only and are adjusted with
+relative SQL (``rating_count = rating_count + 1``) in the same transaction as the
+review change, so nothing has to aggregate the reviews table per request. Callers
+apply a change only when their conditional UPDATE/DELETE of the review matched a
+row, so racing approvals or deletions of one review count it exactly once.
+``rating_avg`` is recomputed from those two in the same UPDATE and backs
+``sort=rating``.
+"""
+from sqlalchemy import Numeric, case, cast
+from app.models.models import Product
+
+
+def apply_review_rating(product: Product, rating: int, delta: int) -> None:
+    """Add (``delta=1``) or remove (``delta=-1``) one approved review of ``rating`` stars; flushed with the session."""
+    count = Product.rating_count + delta
+    total = Product.rating_sum + delta * rating
+    # SET expressions all read the pre-update row, so the average uses the new count and sum
+    product.rating_count = count
+    product.rating_sum = total
+    product.rating_avg = case((count > 0, cast(total, Numeric(10, 4)) / count), else_=0)
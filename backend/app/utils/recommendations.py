@@ -0,0 +1,137 @@
+"""
+"Frequently bought together" recommendations from basket co-occurrence.
+
+``build_recommendations`` is an offline job (``scripts/build_recommendations.py``).
+Baskets are web orders and B2B sales invoices. The pair counting happens in the
+database: a self-join of basket lines on the basket, ``GROUP BY`` the product pair,
+with ``HAVING co_count >= MIN_CO_COUNT``. So the job never holds the full pair
+matrix; the database aggregates it (spilling to disk if it must), and only the
+surviving pairs are streamed back with a server-side cursor. Python keeps one count
+per product and a ``RECOMMENDATION_TOP_K`` heap per product, so memory grows with
+the catalog, not with the order history.
+
+Pairs are scored by cosine similarity (``co / sqrt(n_a * n_b)``, with lift kept for
+reference), and the top ``RECOMMENDATION_TOP_K`` neighbours of every product replace
+the previous ``product_recommendations`` rows in one transaction. Serving is then a
+single indexed lookup on ``(product_id, rank)``.
+"""
+import heapq
+import math
+import time
+from sqlalchemy import and_, delete, func, insert, literal, select, union
+from sqlalchemy.orm import Session
+from app.models.models import (
+    Order, OrderItem, OrderStatus, SalesInvoice, SalesInvoiceItem, SalesInvoiceStatus,
+    ProductRecommendation
+)
+
+RECOMMENDATION_TOP_K = 10
+# Baskets with more distinct products than this (bulk B2B invoices) still count towards
+# product popularity but not towards pairs: their pairs grow quadratically and say little.
+MAX_BASKET_ITEMS = 50
+# Pairs seen together fewer times than this are noise and are dropped.
+MIN_CO_COUNT = 2
+STREAM_CHUNK_SIZE = 10000
+
+
+def _basket_lines():
+    """Distinct ``(kind, basket_id, product_id)`` of counted orders and invoices."""
+    orders = (
+        select(literal("order").label("kind"), OrderItem.order_id.label("basket_id"), OrderItem.product_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status.notin_([OrderStatus.CANCELLED, OrderStatus.RETURNED]), OrderItem.product_id.isnot(None))
+    )
+    invoices = (
+        select(literal("invoice"), SalesInvoiceItem.invoice_id, SalesInvoiceItem.product_id)
+        .join(SalesInvoice, SalesInvoice.id == SalesInvoiceItem.invoice_id)
+        .where(
+            SalesInvoice.status.notin_([SalesInvoiceStatus.DRAFT, SalesInvoiceStatus.CANCELLED]),
+            SalesInvoiceItem.product_id.isnot(None)
+        )
+    )
+    return union(orders, invoices).cte("lines")  # UNION also folds repeated lines of one product
+
+
+def count_items(db: Session, lines) -> tuple:
+    """Return ``({product_id: baskets containing it}, n_baskets)``."""
+    item_counts = dict(db.execute(select(lines.c.product_id, func.count()).group_by(lines.c.product_id)).all())
+    baskets = select(lines.c.kind, lines.c.basket_id).distinct().subquery()
+    n_baskets = db.execute(select(func.count()).select_from(baskets)).scalar()
+    return item_counts, n_baskets
+
+
+def iter_pair_counts(db: Session, lines, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Stream ``(product_a, product_b, co_count)`` with ``a < b`` for pairs bought together often enough."""
+    sized = (
+        select(lines.c.kind, lines.c.basket_id)
+        .group_by(lines.c.kind, lines.c.basket_id)
+        .having(func.count().between(2, MAX_BASKET_ITEMS))
+        .subquery("pair_baskets")
+    )
+    eligible = (
+        select(lines)
+        .join(sized, and_(sized.c.kind == lines.c.kind, sized.c.basket_id == lines.c.basket_id))
+        .cte("eligible")
+    )
+    a, b = eligible.alias("a"), eligible.alias("b")
+    co = func.count().label("co_count")
+    stmt = (
+        select(a.c.product_id, b.c.product_id, co)
+        .join(b, and_(b.c.kind == a.c.kind, b.c.basket_id == a.c.basket_id, a.c.product_id < b.c.product_id))
+        .group_by(a.c.product_id, b.c.product_id)
+        .having(func.count() >= MIN_CO_COUNT)
+    )
+    yield from db.execute(stmt.execution_options(yield_per=chunk_size))
+
+
+def top_neighbours(item_counts, pair_counts, n_baskets, k: int = RECOMMENDATION_TOP_K) -> tuple:
+    """Return ``({product_id: best k neighbours as (score, lift, co_count, neighbour)}, pairs seen)``."""
+    heaps = {}
+    pairs = 0
+    for a, b, co in pair_counts:
+        pairs += 1
+        na, nb = item_counts[a], item_counts[b]
+        score = co / math.sqrt(na * nb)
+        lift = co * n_baskets / (na * nb)
+        for src, dst in ((a, b), (b, a)):
+            heap = heaps.setdefault(src, [])
+            entry = (score, co, lift, dst)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+    return {
+        src: [(score, lift, co, dst) for score, co, lift, dst in sorted(heap, reverse=True)]
+        for src, heap in heaps.items()
+    }, pairs
+
+
+def build_recommendations(db: Session, k: int = RECOMMENDATION_TOP_K) -> dict:
+    """Recompute and persist every product's top-``k`` co-purchased products; commits."""
+    started = time.monotonic()
+    lines = _basket_lines()
+    item_counts, n_baskets = count_items(db, lines)
+    neighbours, pairs = top_neighbours(item_counts, iter_pair_counts(db, lines), n_baskets, k)
+
+    db.execute(delete(ProductRecommendation))
+    rows = []
+    for src, ranked in neighbours.items():
+        for rank, (score, lift, co, dst) in enumerate(ranked, 1):
+            rows.append({
+                "product_id": src, "recommended_product_id": dst, "rank": rank,
+                "score": round(score, 6), "lift": round(lift, 4), "co_count": co,
+            })
+            if len(rows) >= STREAM_CHUNK_SIZE:
+                db.execute(insert(ProductRecommendation), rows)
+                rows = []
+    if rows:
+        db.execute(insert(ProductRecommendation), rows)
+    db.commit()
+
+    return {
+        "baskets": n_baskets,
+        "products": len(item_counts),
+        "pairs": pairs,
+        "products_with_recommendations": len(neighbours),
+        "seconds": round(time.monotonic() - started, 2),
+    }
@@ -0,0 +1,189 @@
+"""
+Time-bounded stock reservations for cart lines.
+
+Adding a line to a cart places a hold of ``RESERVATION_TTL_SECONDS`` on its
+quantity. Each hold is a ``stock_reservations`` row (one per cart line), and the
+total held per product is kept in ``products.reserved``. Availability is therefore
+``stock - reserved``, read from the product row with no per-request scan of holds.
+Holds are taken with one conditional
+``UPDATE products SET reserved = reserved + d WHERE stock - reserved >= d``, so
+concurrent carts cannot over-reserve. Checkout consumes the line's hold together
+with the stock (see ``app.utils.stock.take_stock``).
+
+Expiry is lazy: a lapsed hold keeps counting until the periodic sweep deletes it.
+The sweep runs every ``RESERVATION_SWEEP_SECONDS`` in a background thread. It picks
+lapsed rows off the ``expires_at`` index in batches with ``FOR UPDATE SKIP LOCKED``,
+so it never waits on a cart that is renewing its hold, and hands the quantities back
+to ``products.reserved``. A cart line whose hold was swept re-acquires it on its
+next change or at checkout.
+
+Deleting a cart line releases its hold on any path: the routes release explicitly
+before bulk deletes, and a ``before_delete`` hook on ``CartItem`` covers ORM deletes,
+including the delete-orphan cascade from a cart or user. The foreign key has no
+``ON DELETE CASCADE``, so a delete that skips both fails instead of leaking
+``products.reserved``.
+
+Cached product pages show availability only as ``stock_status`` (in_stock /
+low_stock / out_of_stock), so a reservation change invalidates them and records a
+sync change only when it flips a product's status. The exact count a shopper may
+still add moves with every hold. It is therefore not part of any cached body and is
+served fresh by ``GET /api/products/{id}/availability``.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import bindparam, delete, event, select, update
+from sqlalchemy.orm import Session, object_session
+from app.config import settings
+from app.models.models import CartItem, Product, StockReservation
+from app.utils.cache import queue_product_invalidation
+from app.utils.change_log import record_product_changes
+
+SWEEP_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def stock_status(stock: int, reserved: int, low_stock_threshold: int) -> str:
+    available = stock - reserved
+    if available <= 0:
+        return "out_of_stock"
+    if available <= low_stock_threshold:
+        return "low_stock"
+    return "in_stock"
+
+
+def _adjust_reserved(db: Session, changes: dict, check: bool = False) -> set:
+    """Apply ``{product_id: delta}`` to ``products.reserved``; returns the ids that were updated.
+
+    With ``check``, increases only apply while ``stock - reserved`` covers them.
+    """
+    stmt = update(Product.__table__).where(Product.id == bindparam("b_id"))
+    if check:
+        stmt = stmt.where(Product.stock - Product.reserved >= bindparam("b_delta"))
+    stmt = stmt.values(
+        reserved=Product.reserved + bindparam("b_delta"), updated_at=Product.updated_at
+    ).returning(Product.id, Product.slug, Product.stock, Product.reserved, Product.low_stock_threshold)
+
+    conn = db.connection()
+    updated, flipped = set(), []
+    for product_id, delta in sorted(changes.items()):
+        if not delta:
+            continue
+        row = conn.execute(stmt, {"b_id": product_id, "b_delta": delta}).first()
+        if row is None:
+            continue
+        updated.add(product_id)
+        before = stock_status(row.stock, row.reserved - delta, row.low_stock_threshold)
+        if before != stock_status(row.stock, row.reserved, row.low_stock_threshold):
+            flipped.append(row)
+    if flipped:
+        queue_product_invalidation(db, [row.slug for row in flipped])
+        record_product_changes(db, [row.id for row in flipped])
+    return updated
+
+
+def _expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.RESERVATION_TTL_SECONDS)
+
+
+def hold_line(db: Session, cart_item, quantity: int) -> bool:
+    """Make the hold for ``cart_item`` exactly ``quantity`` and renew its TTL; False when stock is short.
+
+    Nothing is changed when it returns False. The caller commits.
+    """
+    reservation = db.query(StockReservation).filter(
+        StockReservation.cart_item_id == cart_item.id
+    ).with_for_update().first()
+    held = reservation.quantity if reservation else 0
+    delta = quantity - held
+    if delta > 0 and not _adjust_reserved(db, {cart_item.product_id: delta}, check=True):
+        return False
+    if delta < 0:
+        _adjust_reserved(db, {cart_item.product_id: delta})
+
+    if reservation is None:
+        db.add(StockReservation(
+            cart_item_id=cart_item.id, product_id=cart_item.product_id, quantity=quantity, expires_at=_expiry()
+        ))
+    else:
+        reservation.quantity = quantity
+        reservation.expires_at = _expiry()
+    return True
+
+
+def held_by_lines(db: Session, cart_item_ids) -> dict:
+    """``{cart_item_id: quantity}`` currently held for the given cart lines."""
+    return dict(db.query(StockReservation.cart_item_id, StockReservation.quantity).filter(
+        StockReservation.cart_item_id.in_(list(cart_item_ids))
+    ))
+
+
+def _delete_returning(db: Session, criterion) -> dict:
+    """Delete reservations matching ``criterion``; returns ``{product_id: quantity}`` they held."""
+    held = {}
+    # Core on the session's connection, so this also works inside a flush (see _release_on_delete)
+    for product_id, quantity in db.connection().execute(
+        delete(StockReservation.__table__).where(criterion)
+        .returning(StockReservation.product_id, StockReservation.quantity)
+    ):
+        held[product_id] = held.get(product_id, 0) + quantity
+    return held
+
+
+def release_lines(db: Session, cart_item_ids):
+    """Drop the holds of removed cart lines and return their units to availability. The caller commits."""
+    held = _delete_returning(db, StockReservation.cart_item_id.in_(list(cart_item_ids)))
+    _adjust_reserved(db, {product_id: -quantity for product_id, quantity in held.items()})
+
+
+@event.listens_for(CartItem, "before_delete")
+def _release_on_delete(mapper, connection, cart_item):
+    """Release the hold of a cart line deleted through the ORM (route, cart or user cascade)."""
+    release_lines(object_session(cart_item), [cart_item.id])
+
+
+def consume_lines(db: Session, cart_item_ids) -> dict:
+    """Delete the holds of lines being checked out; returns ``{product_id: held}`` for take_stock,
+    which lowers ``products.reserved`` together with the stock."""
+    return _delete_returning(db, StockReservation.cart_item_id.in_(list(cart_item_ids)))
+
+
+def expire_reservations(db: Session) -> int:
+    """Release every lapsed hold in batches, committing each; returns how many were released."""
+    released = 0
+    while True:
+        batch = (
+            select(StockReservation.id)
+            .where(StockReservation.expires_at <= datetime.now(timezone.utc))
+            .order_by(StockReservation.expires_at)
+            .limit(SWEEP_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        ids = list(db.scalars(batch))
+        if not ids:
+            return released
+        held = _delete_returning(db, StockReservation.id.in_(ids))
+        _adjust_reserved(db, {product_id: -quantity for product_id, quantity in held.items()})
+        db.commit()
+        released += len(ids)
+        if len(ids) < SWEEP_BATCH_SIZE:
+            return released
+
+
+def _sweep_forever(session_factory):
+    while True:
+        time.sleep(settings.RESERVATION_SWEEP_SECONDS)
+        db = session_factory()
+        try:
+            expire_reservations(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Stock reservation sweep failed")
+        finally:
+            db.close()
+
+
+def start_reservation_sweeper(session_factory):
+    threading.Thread(target=_sweep_forever, args=(session_factory,), daemon=True).start()
@@ -0,0 +1,120 @@
+"""
+Product full-text search.
+
+On PostgreSQL every product carries a weighted ``tsvector`` (``Product.search_vector``)
+backed by a GIN index, so storefront search is an index lookup instead of a scan of
+four ``ILIKE '%term%'`` predicates. Other dialects (local SQLite setups) fall back to
+the plain ``ILIKE`` filter.
+
+Fuzzy mode tolerates misspellings ("screwdrievr", "PVC elbo") by matching trigram word
+similarity against name and SKU: pg_trgm GIN indexes on PostgreSQL, the in-process
+trigram postings of the suggest index elsewhere.
+"""
+import re
+from sqlalchemy import String, case, false, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.models import Product
+from app.utils.suggest import suggest_index, ensure_fresh
+
+SEARCH_CONFIG = "english"
+
+# Field weights used for ranking: A is the strongest, D the weakest.
+SEARCH_WEIGHTS = (
+    ("name", "A"),
+    ("sku", "A"),
+    ("tags", "B"),
+    ("description", "C"),
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def search_document(product: Product):
+    """SQL expression building the weighted tsvector from the product's current values.
+
+    Values are bound as parameters rather than referencing the columns, so the
+    expression is correct inside an UPDATE that changes those same columns.
+    """
+    document = None
+    for field, weight in SEARCH_WEIGHTS:
+        value = (getattr(product, field) or "").replace(",", " ")
+        part = func.setweight(func.to_tsvector(SEARCH_CONFIG, value), weight)
+        document = part if document is None else document.op("||")(part)
+    return document
+
+
+def refresh_search_vector(db: Session, product: Product) -> None:
+    """Recompute ``product.search_vector``; call after creating or editing a product."""
+    if not is_postgres(db):
+        return
+    product.search_vector = search_document(product)
+
+
+def refresh_search_vectors(db: Session, product_ids) -> None:
+    """Set-based ``refresh_search_vector`` for bulk writes that bypass the ORM objects."""
+    if not is_postgres(db) or not product_ids:
+        return
+    document = None
+    for field, weight in SEARCH_WEIGHTS:
+        value = func.replace(func.coalesce(getattr(Product, field), ""), ",", " ")
+        part = func.setweight(func.to_tsvector(SEARCH_CONFIG, value), weight)
+        document = part if document is None else document.op("||")(part)
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids))
+        .values(search_vector=document)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def build_tsquery(term: str):
+    """Turn free text into an AND-ed prefix tsquery (``"bosch dri"`` -> ``bosch:* & dri:*``)."""
+    tokens = _TOKEN_RE.findall(term.lower())
+    if not tokens:
+        return None
+    return func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{t}:*" for t in tokens))
+
+
+def fuzzy_criterion(db: Session, term: str):
+    """Trigram criterion tolerating typos. Returns ``(criterion, similarity_expression)``."""
+    threshold = settings.FUZZY_SEARCH_THRESHOLD
+    if is_postgres(db):
+        # `<%` is what the GIN trigram indexes serve; its cut-off is a transaction-local setting
+        db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True)))
+        value = literal(term.strip(), String)
+        criterion = or_(value.op("<%")(Product.name), value.op("<%")(Product.sku))
+        return criterion, func.greatest(func.word_similarity(value, Product.name), func.word_similarity(value, Product.sku))
+
+    ensure_fresh(SessionLocal)
+    scores = suggest_index.fuzzy(term, threshold)
+    if not scores:
+        return false(), None
+    return Product.id.in_(list(scores)), case(scores, value=Product.id, else_=0.0)
+
+
+def search_criterion(db: Session, term: str, fuzzy: bool = False):
+    """WHERE criterion matching ``term``. Returns ``(criterion, rank_expression)``; rank is None without FTS."""
+    if fuzzy:
+        return fuzzy_criterion(db, term)
+    if is_postgres(db):
+        tsquery = build_tsquery(term)
+        if tsquery is not None:
+            criterion = or_(
+                Product.search_vector.op("@@")(tsquery),
+                Product.sku.startswith(term.strip().upper(), autoescape=True)
+            )
+            return criterion, func.ts_rank_cd(Product.search_vector, tsquery)
+
+    criterion = or_(
+        Product.name.ilike(f"%{term}%"),
+        Product.description.ilike(f"%{term}%"),
+        Product.tags.ilike(f"%{term}%"),
+        Product.sku.ilike(f"%{term}%")
+    )
+    return criterion, None
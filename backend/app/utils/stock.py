@@ -0,0 +1,89 @@
+"""
+Set-based, contention-safe stock movements for web orders.
+
+Checkout never reads stock into Python and writes it back. ``take_stock`` runs
+one conditional ``UPDATE products SET stock = stock - qty ... WHERE stock >= qty``
+over all order lines and returns the ids it could not cover. The caller rolls back
+unless every line was taken. Units held by other carts' reservations
+(``products.reserved``) do not count as available; the buyer's own holds do.
+
+On PostgreSQL the statement first locks the product rows with
+``SELECT ... ORDER BY id FOR UPDATE`` in a CTE, so two carts sharing products
+always lock them in the same order and cannot deadlock. A concurrent checkout
+blocks only until the first one commits. The ``WHERE`` is then re-checked against
+the committed stock, so a hot SKU is never oversold. Other dialects run the same
+conditional UPDATE once per line, in id order.
+
+Callers issue these statements last, just before COMMIT, to keep row locks short.
+They bypass the ORM, so they record cache and change-log updates themselves.
+"""
+from sqlalchemy import Integer, String, bindparam, column, insert, select, update, values
+from sqlalchemy.orm import Session
+from app.models.models import Product, InventoryLog
+from app.utils.search import is_postgres
+
+
+def _take_returning(db: Session, lines) -> set:
+    data = values(column("id", String), column("qty", Integer), column("held", Integer), name="v").data(lines)
+    locked = (
+        select(Product.id).where(Product.id.in_([line[0] for line in lines]))
+        .order_by(Product.id).with_for_update().cte("locked")
+    )
+    stmt = (
+        update(Product)
+        .where(
+            Product.id == data.c.id, Product.id == locked.c.id,
+            Product.stock - Product.reserved + data.c.held >= data.c.qty
+        )
+        .values(stock=Product.stock - data.c.qty, reserved=Product.reserved - data.c.held)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
+    return set(db.execute(stmt).scalars())
+
+
+def _take_per_line(db: Session, lines) -> set:
+    stmt = (
+        update(Product.__table__)
+        .where(
+            Product.id == bindparam("b_id"),
+            Product.stock - Product.reserved + bindparam("b_held") >= bindparam("b_qty")
+        )
+        .values(stock=Product.stock - bindparam("b_qty"), reserved=Product.reserved - bindparam("b_held"))
+    )
+    conn = db.connection()
+    return {
+        product_id for product_id, qty, held in lines
+        if conn.execute(stmt, {"b_id": product_id, "b_qty": qty, "b_held": held}).rowcount
+    }
+
+
+def take_stock(db: Session, quantities: dict, held: dict = None) -> list:
+    """Decrement ``{product_id: qty}`` where enough is available; returns the ids that fell short.
+
+    ``held`` is what the buyer's own reservations hold per product (see app.utils.reservations):
+    those units count as available to them and are released from ``reserved`` in the same UPDATE.
+    """
+    held = held or {}
+    lines = [(product_id, qty, held.get(product_id, 0)) for product_id, qty in sorted(quantities.items())]
+    taken = (_take_returning if is_postgres(db) else _take_per_line)(db, lines)
+    return [product_id for product_id, _, _ in lines if product_id not in taken]
+
+
+def restore_stock(db: Session, quantities: dict):
+    """Add ``{product_id: qty}`` back (cancellations) with one in-place UPDATE per product, in id order."""
+    stmt = (
+        update(Product.__table__)
+        .where(Product.id == bindparam("b_id"))
+        .values(stock=Product.stock + bindparam("b_qty"))
+    )
+    db.connection().execute(stmt, [{"b_id": product_id, "b_qty": qty} for product_id, qty in sorted(quantities.items())])
+
+
+def log_stock_movements(db: Session, quantities: dict, sign: int, reason: str, user_id: str):
+    """One batched InventoryLog insert for a set of movements."""
+    if quantities:
+        db.execute(insert(InventoryLog), [
+            {"product_id": product_id, "change": sign * qty, "reason": reason, "performed_by": user_id}
+            for product_id, qty in sorted(quantities.items())
+        ])
@@ -0,0 +1,246 @@
+"""
+In-memory prefix index for search-box / line-item typeahead.
+
+Keys (every word of the name, the full name, the SKU and the brand, lower-cased) are
+kept in one sorted list of ``(key, product_id)`` tuples, so a prefix lookup is a
+``bisect`` plus a short forward scan - no database round trip. The index is built on
+first use, patched after every committed product write in this process, and fully
+rebuilt in the background once it is older than ``SUGGEST_REBUILD_SECONDS`` to pick
+up writes made by other workers. Patches committed while a rebuild reads the table
+are journaled and replayed onto the new index before it is swapped in, so the
+rebuild's older snapshot never undoes them.
+
+The same index keeps trigram postings over name and SKU, which back fuzzy search on
+databases without pg_trgm (see ``app.utils.search``).
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from sqlalchemy import event, inspect
+from app.config import settings
+
+_WORD_RE = re.compile(r"[\w\-./]+", re.UNICODE)
+_TRGM_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_FIELDS = ("id", "name", "slug", "sku", "brand", "is_active")
+
+# Upper bound on keys inspected per lookup; keeps latency flat for very short prefixes.
+MAX_SCAN = 500
+
+
+def _keys(entry: dict) -> set:
+    name = (entry["name"] or "").lower()
+    keys = {name, (entry["sku"] or "").lower(), (entry["brand"] or "").lower()}
+    keys.update(_WORD_RE.findall(name))
+    keys.discard("")
+    return keys
+
+
+def trigrams(text: str) -> set:
+    """Trigrams the way pg_trgm extracts them: per word, padded with two leading and one trailing blank."""
+    grams = set()
+    for word in _TRGM_WORD_RE.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _grams(entry: dict) -> set:
+    return trigrams(f"{entry['name'] or ''} {entry['sku'] or ''}")
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._keys = []        # sorted (key, product_id)
+        self._entries = {}     # product_id -> entry dict
+        self._grams = {}       # trigram -> set of product_ids
+        self._lock = threading.RLock()
+        self.built_at = None
+        self._rebuilding = False
+        self._journal = None   # changes applied while a rebuild is reading, or None
+
+    # ─── maintenance ─────────────────────────────────────
+    def begin_rebuild(self):
+        """Start journaling ``apply`` calls; call before reading the rows passed to ``load``."""
+        with self._lock:
+            self._journal = []
+
+    def cancel_rebuild(self):
+        with self._lock:
+            self._journal = None
+
+    def load(self, rows):
+        keys, entries, grams = [], {}, {}
+        for row in rows:
+            entry = dict(zip(_FIELDS, row))
+            if not entry["is_active"]:
+                continue
+            entries[entry["id"]] = entry
+            keys.extend((k, entry["id"]) for k in _keys(entry))
+            for gram in _grams(entry):
+                grams.setdefault(gram, set()).add(entry["id"])
+        keys.sort()
+        with self._lock:
+            self._keys, self._entries, self._grams = keys, entries, grams
+            journal, self._journal = self._journal or [], None
+            for changes in journal:
+                self._patch(changes)
+            self.built_at = time.monotonic()
+
+    def apply(self, changes: dict):
+        """Patch the index with ``product_id -> entry`` (``None`` removes the product)."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(changes)
+            if self.built_at is not None:
+                self._patch(changes)
+
+    def _patch(self, changes: dict):
+        for product_id, entry in changes.items():
+            if entry is None:
+                self.remove(product_id)
+            else:
+                self.upsert(entry)
+
+    def remove(self, product_id: str):
+        with self._lock:
+            entry = self._entries.pop(product_id, None)
+            if entry is None:
+                return
+            for key in _keys(entry):
+                i = bisect_left(self._keys, (key, product_id))
+                if i < len(self._keys) and self._keys[i] == (key, product_id):
+                    del self._keys[i]
+            for gram in _grams(entry):
+                self._grams.get(gram, set()).discard(product_id)
+
+    def upsert(self, entry: dict):
+        with self._lock:
+            self.remove(entry["id"])
+            if not entry["is_active"]:
+                return
+            self._entries[entry["id"]] = entry
+            for key in _keys(entry):
+                insort(self._keys, (key, entry["id"]))
+            for gram in _grams(entry):
+                self._grams.setdefault(gram, set()).add(entry["id"])
+
+    # ─── lookup ──────────────────────────────────────────
+    def search(self, query: str, limit: int) -> list:
+        words = _WORD_RE.findall(query.lower())
+        if not words:
+            return []
+        # Look up the longest word (most selective); the others must prefix some name word.
+        lead = max(words, key=len)
+        rest = [w for w in words if w is not lead]
+        with self._lock:
+            keys, entries = self._keys, self._entries
+            results, seen = [], set()
+            i = bisect_left(keys, (lead,))
+            end = min(len(keys), i + MAX_SCAN)
+            while i < end and keys[i][0].startswith(lead) and len(results) < limit:
+                product_id = keys[i][1]
+                i += 1
+                if product_id in seen:
+                    continue
+                seen.add(product_id)
+                entry = entries[product_id]
+                if rest:
+                    haystack = _keys(entry)
+                    if not all(any(k.startswith(w) for k in haystack) for w in rest):
+                        continue
+                results.append({f: entry[f] or "" for f in ("id", "name", "slug", "sku", "brand")})
+        return results
+
+    def fuzzy(self, query: str, threshold: float) -> dict:
+        """Product id -> share of the query's trigrams present in its name/SKU, for shares >= ``threshold``.
+
+        Like pg_trgm's ``word_similarity``, a short misspelled query scores high against a
+        long name that contains a close match.
+        """
+        grams = trigrams(query)
+        if not grams:
+            return {}
+        hits = Counter()
+        with self._lock:
+            for gram in grams:
+                hits.update(self._grams.get(gram, ()))
+        scores = {product_id: n / len(grams) for product_id, n in hits.items()}
+        return {product_id: score for product_id, score in scores.items() if score >= threshold}
+
+    def mark_stale(self):
+        """Force a background rebuild on the next lookup (after writes that bypass the ORM)."""
+        if self.built_at is not None:
+            self.built_at = float("-inf")
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+suggest_index = SuggestIndex()
+
+
+def _load_from_db(session_factory):
+    from app.models.models import Product
+    db = session_factory()
+    try:
+        suggest_index.begin_rebuild()
+        suggest_index.load(db.query(*(getattr(Product, f) for f in _FIELDS)).yield_per(5000))
+    except Exception:
+        suggest_index.cancel_rebuild()
+        raise
+    finally:
+        db.close()
+
+
+def _rebuild_in_background(session_factory):
+    try:
+        _load_from_db(session_factory)
+    finally:
+        suggest_index._rebuilding = False
+
+
+def ensure_fresh(session_factory):
+    """Build on first use; start a background rebuild once the index is stale."""
+    if suggest_index.built_at is None:
+        with suggest_index._lock:
+            if suggest_index.built_at is None:
+                _load_from_db(session_factory)
+        return
+    age = time.monotonic() - suggest_index.built_at
+    if age > settings.SUGGEST_REBUILD_SECONDS and not suggest_index._rebuilding:
+        suggest_index._rebuilding = True
+        threading.Thread(target=_rebuild_in_background, args=(session_factory,), daemon=True).start()
+
+
+# ─── ORM-driven maintenance ─────────────────────────────
+def _collect(session, flush_context):
+    from app.models.models import Product
+
+    pending = session.info.setdefault("suggest_updates", {})
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            pending[obj.id] = None
+    for obj in list(session.new) + [o for o in session.dirty if session.is_modified(o)]:
+        if isinstance(obj, Product):
+            state = inspect(obj)
+            # Only snapshot plain values; SQL expressions (e.g. stock = stock - 1) are irrelevant here
+            if any(state.attrs[f].history.has_changes() for f in _FIELDS[1:]) or obj in session.new:
+                pending[obj.id] = {f: getattr(obj, f) for f in _FIELDS}
+
+
+def _apply(session):
+    pending = session.info.pop("suggest_updates", None)
+    if pending:
+        suggest_index.apply(pending)
+
+
+def _discard(session):
+    session.info.pop("suggest_updates", None)
+
+
+def register_suggest_index(session_factory):
+    event.listen(session_factory, "after_flush", _collect)
+    event.listen(session_factory, "after_commit", _apply)
+    event.listen(session_factory, "after_rollback", _discard)
@@ -0,0 +1,19 @@
+"""Rebuild "frequently bought together" recommendations from orders and sales invoices.
+
+Run nightly from backend/ (e.g. cron): python scripts/build_recommendations.py
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.utils.recommendations import build_recommendations
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        stats = build_recommendations(db)
+        print(f"Success: {stats}")
+    finally:
+        db.close()
@@ -0,0 +1,47 @@
+"""Render resized variants for product images uploaded before variants existed.
+
+Usage (from backend/): python scripts/generate_image_variants.py
+"""
+import sys
+import os
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.models import ProductImage
+from app.utils.images import RESIZABLE_EXTENSIONS, image_pool, render_variants
+
+
+def generate_variants():
+    db = SessionLocal()
+    try:
+        images = db.query(ProductImage).filter(
+            ProductImage.image_url.like("/uploads/%"),
+            (ProductImage.variants == None) | (ProductImage.variants.in_(["", "{}"]))
+        ).all()
+        paths = {}
+        for img in images:
+            name = img.image_url[len("/uploads/"):]
+            path = os.path.join(settings.UPLOAD_DIR, name)
+            if os.path.splitext(name)[1].lower() in RESIZABLE_EXTENSIONS and os.path.exists(path):
+                paths.setdefault(path, []).append(img)
+
+        print(f"Rendering variants for {len(paths)} file(s)")
+        futures = {image_pool().submit(render_variants, path): path for path in paths}
+        for future, path in futures.items():
+            try:
+                variants = future.result()
+            except Exception as e:
+                print(f"Skipped {path}: {e}")
+                continue
+            for img in paths[path]:
+                img.variants = json.dumps(variants)
+        db.commit()
+        print("Success: image variants generated.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    generate_variants()
@@ -0,0 +1,16 @@
+"""Deliver queued order, invoice and payment side effects from the outbox (see app/utils/outbox.py).
+
+Run from backend/ as a long-lived process next to the API: python scripts/outbox_worker.py
+"""
+import sys
+import os
+import logging
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.utils.outbox import run_worker
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run_worker(SessionLocal)
@@ -11,11 +11,16 @@ from datetime import datetime, timedelta, timezone
 from app.database import engine, SessionLocal, Base
 from app.models.models import *
 from app.utils.auth import hash_password
+from app.utils.search import refresh_search_vector
+from app.utils.category_tree import assign_path
+from app.utils.change_log import register_change_log
 
 # Recreate all tables
 Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
 
+# Seeded products go into the change sequence so delta-sync clients see them
+register_change_log(SessionLocal)
 db = SessionLocal()
 
 # ─── ADMIN USER ──────────────────────────────────────────
@@ -129,6 +134,7 @@ categories_data = [
 cats = {}
 for name, slug, desc, order in categories_data:
     cat = Category(name=name, slug=slug, description=desc, sort_order=order)
+    assign_path(db, cat)
     db.add(cat)
     db.flush()
     cats[slug] = cat
@@ -190,6 +196,7 @@ for (name, slug, sku, desc, short, price, compare, cost, cat_slug, brand, stock,
         category_id=cats[cat_slug].id, brand=brand, stock=stock, tags=tags,
         is_featured=featured, unit="piece"
     )
+    refresh_search_vector(db, p)
     db.add(p)
     db.flush()
     # Add placeholder image
@@ -0,0 +1,114 @@
+"""
+Outbox delivery against an in-memory SQLite database: publish -> drain_outbox ->
+retry with backoff -> parked as failed. Run from backend/ with ``python -m pytest``.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import datetime, timedelta, timezone  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, update  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.models.models import OutboxEvent  # noqa: E402
+from app.utils import outbox  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    OutboxEvent.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Swap the registry for a consumer that succeeds and one that always fails."""
+    monkeypatch.setattr(outbox, "CONSUMERS", {})
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_SECONDS", 5)
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_MAX_SECONDS", 60)
+    seen = []
+
+    @outbox.consumer("mailer", "order.placed")
+    def _mailer(topic, payload):
+        seen.append(("mailer", topic, payload))
+
+    @outbox.consumer("flaky", "order.placed", "payment.created")
+    def _flaky(topic, payload):
+        seen.append(("flaky", topic, payload))
+        raise RuntimeError("provider down")
+
+    return seen
+
+
+def _event(db, consumer):
+    return db.query(OutboxEvent).filter(OutboxEvent.consumer == consumer).one()
+
+
+def _make_due(db):
+    db.execute(update(OutboxEvent).values(available_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+    db.commit()
+
+
+def test_publish_adds_nothing_until_commit_and_nothing_after_rollback(db, calls):
+    outbox.publish(db, "order.placed", {"order_id": "o1"})
+    db.rollback()
+    assert db.query(OutboxEvent).count() == 0
+
+    outbox.publish(db, "order.placed", {"order_id": "o1"})
+    outbox.publish(db, "sales_invoice.created", {"invoice_id": "i1"})  # no subscribers
+    db.commit()
+    assert sorted(e.consumer for e in db.query(OutboxEvent)) == ["flaky", "mailer"]
+
+
+def test_failing_consumer_is_retried_with_backoff_then_parked(db, calls):
+    outbox.publish(db, "order.placed", {"order_id": "o1", "total": 10})
+    db.commit()
+
+    assert outbox.drain_outbox(db) == 2
+    mailer, flaky = _event(db, "mailer"), _event(db, "flaky")
+    assert (mailer.status, mailer.attempts) == ("done", 0)
+    assert mailer.processed_at is not None
+    assert (flaky.status, flaky.attempts) == ("pending", 1)
+    assert "provider down" in flaky.last_error
+    assert sorted(name for name, _, _ in calls) == ["flaky", "mailer"]
+    assert all(payload == {"order_id": "o1", "total": 10} for _, _, payload in calls)
+
+    # Backed off: not due yet, and the delivered consumer never runs again
+    assert outbox.drain_outbox(db) == 0
+    assert len(calls) == 2
+
+    _make_due(db)
+    assert outbox.drain_outbox(db) == 1
+    assert (_event(db, "flaky").status, _event(db, "flaky").attempts) == ("pending", 2)
+
+    _make_due(db)
+    assert outbox.drain_outbox(db) == 1
+    flaky = _event(db, "flaky")
+    assert (flaky.status, flaky.attempts) == ("failed", 3)
+
+    _make_due(db)
+    assert outbox.drain_outbox(db) == 0
+    assert [name for name, _, _ in calls].count("flaky") == 3
+    assert [name for name, _, _ in calls].count("mailer") == 1
+
+
+def test_unknown_consumer_counts_as_a_failure(db, calls):
+    db.add(OutboxEvent(topic="order.placed", consumer="retired", payload="{}"))
+    db.commit()
+    assert outbox.drain_outbox(db) == 1
+    event = _event(db, "retired")
+    assert (event.status, event.attempts) == ("pending", 1)
+    assert "retired" in event.last_error
+
+
+def test_backoff_doubles_with_jitter_and_is_capped(calls):
+    for attempts, full in [(1, 5), (2, 10), (3, 20), (5, 60), (12, 60)]:
+        delay = outbox._backoff(attempts).total_seconds()
+        assert full * 0.5 <= delay <= full
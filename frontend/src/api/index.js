@@ -42,6 +42,9 @@ export const authAPI = {
 export const productsAPI = {
   list: params => api.get('/products', { params }),
   get: slug => api.get(`/products/${slug}`),
+  recommendations: id => api.get(`/products/${id}/recommendations`),
+  availability: id => api.get(`/products/${id}/availability`),
+  changes: (since, params) => api.get('/products/changes', { params: { since, ...params } }),
   create: data => api.post('/products', data),
   update: (id, data) => api.put(`/products/${id}`, data),
   delete: id => api.delete(`/products/${id}`),
@@ -67,7 +70,8 @@ export const cartAPI = {
 
 // ─── Orders ─────────────────
 export const ordersAPI = {
-  create: data => api.post('/orders', data),
+  // Pass the same idempotencyKey when retrying a checkout that may have gone through
+  create: (data, idempotencyKey) => api.post('/orders', data, idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : undefined),
   myOrders: params => api.get('/orders', { params }),
   get: id => api.get(`/orders/${id}`),
   allOrders: params => api.get('/orders/all', { params }),
@@ -86,7 +90,7 @@ export const couponsAPI = {
 
 // ─── Reviews ────────────────
 export const reviewsAPI = {
-  getForProduct: productId => api.get(`/reviews/product/${productId}`),
+  getForProduct: (productId, params) => api.get(`/reviews/product/${productId}`, { params }),
   add: (productId, data) => api.post(`/reviews/product/${productId}`, data),
   pending: () => api.get('/reviews/pending'),
   approve: id => api.put(`/reviews/${id}/approve`),
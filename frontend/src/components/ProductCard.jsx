@@ -11,7 +11,12 @@ export default function ProductCard({ product }) {
   const { user } = useAuth();
   const [adding, setAdding] = useState(false);
   const [inWishlist, setInWishlist] = useState(false);
-  const image = product.images?.find(i => i.is_primary)?.image_url || product.images?.[0]?.image_url || 'https://placehold.co/400x400/EEE/999?text=No+Image';
+  // Accepts the full product or the compact list item (view=compact)
+  const primary = product.images?.find(i => i.is_primary) || product.images?.[0];
+  const image = primary?.variants?.medium?.jpeg || primary?.image_url || product.image_url || 'https://placehold.co/400x400/EEE/999?text=No+Image';
+  const srcset = primary?.srcset || product.image_srcset || {};
+  const outOfStock = product.stock_status ? product.stock_status === 'out_of_stock' : product.stock <= 0;
+  const sizes = '(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw';
   const discount = product.compare_price ? Math.round((1 - product.price / product.compare_price) * 100) : 0;
 
   const handleAddToCart = async () => {
@@ -44,14 +49,17 @@ export default function ProductCard({ product }) {
   return (
     <div className="card group hover:shadow-xl transition-all duration-300 hover:-translate-y-1 border border-gray-200">
       <Link to={`/product/${product.slug}`} className="block relative overflow-hidden rounded-t-xl">
-        <img src={image} alt={product.name} className="w-full h-64 object-cover group-hover:scale-110 transition-transform duration-500" />
+        <picture>
+          {srcset.webp && <source type="image/webp" srcSet={srcset.webp} sizes={sizes} />}
+          <img src={image} srcSet={srcset.jpeg} sizes={srcset.jpeg ? sizes : undefined} alt={product.name} loading="lazy" className="w-full h-64 object-cover group-hover:scale-110 transition-transform duration-500" />
+        </picture>
         {discount > 0 && (
           <span className="absolute top-3 left-3 bg-red-500 text-white text-xs font-bold px-3 py-1.5 rounded-lg shadow-lg">{discount}% OFF</span>
         )}
-        {product.stock <= 0 && (
+        {outOfStock && (
           <span className="absolute top-3 right-3 bg-gray-900 text-white text-xs font-bold px-3 py-1.5 rounded-lg shadow-lg">Out of Stock</span>
         )}
-        {product.is_featured && product.stock > 0 && (
+        {product.is_featured && !outOfStock && (
           <span className="absolute top-3 right-3 bg-yellow-400 text-gray-900 text-xs font-bold px-3 py-1.5 rounded-lg shadow-lg flex items-center gap-1"><Star className="w-3 h-3 fill-current" /> Featured</span>
         )}
         <button 
@@ -65,10 +73,17 @@ export default function ProductCard({ product }) {
       </Link>
 
       <div className="p-5">
-        <p className="text-xs text-gray-500 mb-1 uppercase font-medium tracking-wide">{product.brand || product.category?.name}</p>
+        <p className="text-xs text-gray-500 mb-1 uppercase font-medium tracking-wide">{product.brand || product.category?.name || product.category_name}</p>
         <Link to={`/product/${product.slug}`}>
           <h3 className="font-semibold text-gray-900 line-clamp-2 hover:text-primary-600 transition-colors h-12">{product.name}</h3>
         </Link>
+        {product.rating_count > 0 && (
+          <div className="flex items-center gap-1 mt-1 text-sm text-gray-600">
+            <Star className="w-4 h-4 text-yellow-400 fill-current" />
+            <span>{product.rating_avg.toFixed(1)}</span>
+            <span className="text-gray-400">({product.rating_count})</span>
+          </div>
+        )}
 
         <div className="flex items-baseline gap-2 mt-3">
           <span className="text-2xl font-bold text-gray-900">₹{product.price.toLocaleString()}</span>
@@ -78,7 +93,7 @@ export default function ProductCard({ product }) {
         </div>
 
         <div className="flex items-center gap-2 mt-4">
-          <button onClick={handleAddToCart} disabled={product.stock <= 0 || adding}
+          <button onClick={handleAddToCart} disabled={outOfStock || adding}
             className={`flex-1 btn-primary text-sm !py-2.5 flex items-center justify-center gap-2 font-medium transition-all ${adding ? 'bg-green-500 hover:bg-green-600' : ''}`}>
             <ShoppingCart className={`w-4 h-4 ${adding ? 'animate-bounce' : ''}`} /> 
             {adding ? 'Added!' : 'Add to Cart'}
@@ -318,7 +318,7 @@ export default function AdminGRNPage() {
   const handleSubmit = async (e) => {
     e.preventDefault();
 
-    if (!formData.grn_number || !formData.supplier_id) {
+    if (!formData.supplier_id) {
       toast.error('Please fill all required fields');
       return;
     }
@@ -332,7 +332,7 @@ export default function AdminGRNPage() {
       // Clean up data: remove empty strings for optional fields
       const cleanedData = {
         ...formData,
-        grn_number: formData.grn_number.toUpperCase(),
+        grn_number: formData.grn_number.trim().toUpperCase(), // blank: numbered by the server
         warehouse_id: formData.warehouse_id || null,
         supplier_invoice_number: (formData.supplier_invoice_number || '').toUpperCase(),
         supplier_invoice_date: formData.supplier_invoice_date || null,
@@ -507,13 +507,13 @@ export default function AdminGRNPage() {
 
                 <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
                   <div>
-                    <label className="block text-sm font-medium mb-1">GRN Number *</label>
+                    <label className="block text-sm font-medium mb-1">GRN Number</label>
                     <input
                       type="text"
                       value={formData.grn_number}
                       onChange={(e) => setFormData({ ...formData, grn_number: e.target.value })}
                       className="w-full px-3 py-2 border rounded-lg"
-                      required
+                      placeholder="Auto"
                     />
                   </div>
 
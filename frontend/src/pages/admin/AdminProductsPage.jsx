@@ -12,6 +12,7 @@ export default function AdminProductsPage() {
   const [search, setSearch] = useState('');
   const [page, setPage] = useState(1);
   const [total, setTotal] = useState(0);
+  const [totalExact, setTotalExact] = useState(true);
   const [showForm, setShowForm] = useState(false);
   const [editing, setEditing] = useState(null);
   const [form, setForm] = useState({
@@ -30,6 +31,7 @@ export default function AdminProductsPage() {
       .then(res => {
         setProducts(res.data.products || []);
         setTotal(res.data.total || 0);
+        setTotalExact(res.data.total_exact ?? true);
       })
       .catch(() => toast.error('Failed to load products'))
       .finally(() => setLoading(false));
@@ -156,7 +158,7 @@ export default function AdminProductsPage() {
   return (
     <div className="p-6">
       <div className="flex flex-col sm:flex-row justify-between items-start sm:items-center gap-4 mb-6">
-        <h1 className="text-2xl font-bold">Products ({total})</h1>
+        <h1 className="text-2xl font-bold">Products ({totalExact ? '' : '~'}{total})</h1>
         <PermissionGuard permission="catalog:manage">
           <button onClick={openCreate} className="btn-primary flex items-center gap-2"><Plus className="w-4 h-4" /> Add Product</button>
         </PermissionGuard>
@@ -253,7 +253,7 @@ export default function AdminPurchaseOrdersPage() {
   const handleSubmit = async (e) => {
     e.preventDefault();
 
-    if (!formData.po_number || !formData.supplier_id) {
+    if (!formData.supplier_id) {
       toast.error('Please fill all required fields');
       return;
     }
@@ -267,7 +267,7 @@ export default function AdminPurchaseOrdersPage() {
       // Clean up data
       const data = {
         ...formData,
-        po_number: formData.po_number.toUpperCase(),
+        po_number: formData.po_number.trim().toUpperCase(), // blank: numbered by the server
         warehouse_id: formData.warehouse_id || null, // Convert empty string to null
         expected_delivery_date: formData.expected_delivery_date || null, // Convert empty string to null
         items: formData.items.map(item => ({
@@ -427,13 +427,13 @@ export default function AdminPurchaseOrdersPage() {
           <form onSubmit={handleSubmit} className="space-y-6">
             <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
               <div>
-                <label className="block text-sm font-medium mb-1">PO Number *</label>
+                <label className="block text-sm font-medium mb-1">PO Number</label>
                 <input
                   type="text"
                   value={formData.po_number}
                   onChange={(e) => setFormData({ ...formData, po_number: e.target.value })}
                   className="w-full px-3 py-2 border rounded-lg"
-                  required
+                  placeholder="Auto"
                 />
               </div>
 
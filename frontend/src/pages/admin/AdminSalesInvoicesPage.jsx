@@ -265,7 +265,7 @@ export default function AdminSalesInvoicesPage() {
 
     console.log('Form submitted with data:', formData);
 
-    if (!formData.invoice_number || !formData.customer_id) {
+    if (!formData.customer_id) {
       toast.error('Please fill all required fields');
       return;
     }
@@ -279,7 +279,7 @@ export default function AdminSalesInvoicesPage() {
       // Clean up data: convert empty strings to null for optional date fields
       const cleanedData = {
         ...formData,
-        invoice_number: formData.invoice_number.toUpperCase(),
+        invoice_number: formData.invoice_number.trim().toUpperCase(), // blank: numbered by the server
         due_date: formData.due_date || null,
         ack_date: formData.ack_date || null
       };
@@ -511,13 +511,13 @@ export default function AdminSalesInvoicesPage() {
 
             <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
               <div>
-                <label className="block text-sm font-medium mb-1">Invoice Number *</label>
+                <label className="block text-sm font-medium mb-1">Invoice Number</label>
                 <input
                   type="text"
                   value={formData.invoice_number}
                   onChange={(e) => setFormData({ ...formData, invoice_number: e.target.value })}
                   className="w-full px-3 py-2 border rounded-lg"
-                  required
+                  placeholder="Auto"
                 />
               </div>
 
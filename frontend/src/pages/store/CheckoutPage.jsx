@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { addressesAPI, ordersAPI, couponsAPI } from '../../api';
 import { useCart } from '../../context/CartContext';
@@ -17,6 +17,8 @@ export default function CheckoutPage() {
   const [submitting, setSubmitting] = useState(false);
   const [newAddr, setNewAddr] = useState({ full_name: '', phone: '', address_line1: '', address_line2: '', city: '', state: '', pincode: '', label: 'Home' });
   const [showNewAddr, setShowNewAddr] = useState(false);
+  // Kept across retries after a network failure so the server never places the order twice
+  const orderKey = useRef(null);
 
   const shipping = subtotal >= 500 ? 0 : 50;
   const tax = Math.round((subtotal - discount) * 0.18);
@@ -56,17 +58,20 @@ export default function CheckoutPage() {
   const placeOrder = async () => {
     if (!selectedAddr) { toast.error('Please select a delivery address'); return; }
     setSubmitting(true);
+    orderKey.current = orderKey.current || crypto.randomUUID();
     try {
       const r = await ordersAPI.create({
         address_id: selectedAddr,
         payment_method: paymentMethod,
         coupon_code: discount > 0 ? couponCode : null,
         notes
-      });
+      }, orderKey.current);
       await clearCart();
       navigate(`/order-confirmation/${r.data.id}`);
       toast.success('Order placed successfully!');
     } catch (err) {
+      // A 409 means the first attempt is still running: keep the key so a retry replays it
+      if (err.response && err.response.status !== 409) orderKey.current = null;
       toast.error(err.response?.data?.detail || 'Failed to place order');
     } finally {
       setSubmitting(false);
@@ -16,7 +16,7 @@ export default function HomePage() {
 
   useEffect(() => {
     Promise.all([
-      productsAPI.list({ featured: true, page_size: 8 }),
+      productsAPI.list({ featured: true, page_size: 8, view: 'compact' }),
       categoriesAPI.list(),
       bannersAPI.list()
     ]).then(([prod, cat, ban]) => {
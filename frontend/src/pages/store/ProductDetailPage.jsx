@@ -4,6 +4,7 @@ import { productsAPI, reviewsAPI } from '../../api';
 import { useCart } from '../../context/CartContext';
 import { useAuth } from '../../context/AuthContext';
 import { LoadingSpinner, StatusBadge } from '../../components/UI';
+import ProductCard from '../../components/ProductCard';
 import { ShoppingCart, Heart, Minus, Plus, Star, Check, Truck } from 'lucide-react';
 import toast from 'react-hot-toast';
 
@@ -13,6 +14,9 @@ export default function ProductDetailPage() {
   const { user } = useAuth();
   const [product, setProduct] = useState(null);
   const [reviews, setReviews] = useState([]);
+  const [reviewPage, setReviewPage] = useState({ page: 1, total_pages: 0 });
+  const [boughtTogether, setBoughtTogether] = useState([]);
+  const [available, setAvailable] = useState(null);
   const [quantity, setQuantity] = useState(1);
   const [activeImage, setActiveImage] = useState(0);
   const [reviewForm, setReviewForm] = useState({ rating: 5, title: '', comment: '' });
@@ -23,13 +27,28 @@ export default function ProductDetailPage() {
     setLoading(true);
     productsAPI.get(slug).then(r => {
       setProduct(r.data);
+      refreshAvailability(r.data.id);
+      productsAPI.recommendations(r.data.id).then(rec => setBoughtTogether(rec.data)).catch(() => setBoughtTogether([]));
       return reviewsAPI.getForProduct(r.data.id);
-    }).then(r => setReviews(r.data)).finally(() => setLoading(false));
+    }).then(r => {
+      setReviews(r.data.reviews);
+      setReviewPage({ page: r.data.page, total_pages: r.data.total_pages });
+    }).finally(() => setLoading(false));
   }, [slug]);
 
-  const handleAddToCart = () => {
-    addToCart(product.id, quantity);
+  const loadMoreReviews = async () => {
+    const r = await reviewsAPI.getForProduct(product.id, { page: reviewPage.page + 1 });
+    setReviews([...reviews, ...r.data.reviews]);
+    setReviewPage({ page: r.data.page, total_pages: r.data.total_pages });
+  };
+
+  // Not part of the cached product payload: other carts' holds change it between page loads
+  const refreshAvailability = id => productsAPI.availability(id).then(r => setAvailable(r.data.available_stock)).catch(() => {});
+
+  const handleAddToCart = async () => {
+    await addToCart(product.id, quantity);
     setQuantity(1);
+    refreshAvailability(product.id);
   };
 
   const handleReview = async (e) => {
@@ -48,7 +67,7 @@ export default function ProductDetailPage() {
 
   const images = product.images?.length > 0 ? product.images : [{ image_url: 'https://placehold.co/600x600/EEE/999?text=No+Image' }];
   const discount = product.compare_price ? Math.round((1 - product.price / product.compare_price) * 100) : 0;
-  const avgRating = reviews.length ? (reviews.reduce((s, r) => s + r.rating, 0) / reviews.length).toFixed(1) : 0;
+  const avgRating = product.rating_count ? product.rating_avg.toFixed(1) : 0;
 
   return (
     <div className="max-w-7xl mx-auto px-4 py-8">
@@ -81,10 +100,10 @@ export default function ProductDetailPage() {
           <p className="text-sm text-primary-600 font-medium mb-1">{product.brand}</p>
           <h1 className="text-2xl md:text-3xl font-bold text-gray-900 mb-2">{product.name}</h1>
 
-          {reviews.length > 0 && (
+          {product.rating_count > 0 && (
             <div className="flex items-center gap-2 mb-3">
               <div className="flex items-center text-yellow-400">{[...Array(5)].map((_, i) => <Star key={i} className={`w-4 h-4 ${i < Math.round(avgRating) ? 'fill-current' : ''}`} />)}</div>
-              <span className="text-sm text-gray-600">{avgRating} ({reviews.length} reviews)</span>
+              <span className="text-sm text-gray-600">{avgRating} ({product.rating_count} reviews)</span>
             </div>
           )}
 
@@ -101,8 +120,8 @@ export default function ProductDetailPage() {
           </div>
 
           <div className="flex items-center gap-2 mb-4">
-            {product.stock > 0 ? (
-              <span className="flex items-center gap-1 text-green-600 text-sm"><Check className="w-4 h-4" /> In Stock ({product.stock} available)</span>
+            {product.stock_status !== 'out_of_stock' ? (
+              <span className="flex items-center gap-1 text-green-600 text-sm"><Check className="w-4 h-4" /> {product.stock_status === 'low_stock' ? 'Only a few left' : 'In Stock'}</span>
             ) : (
               <span className="text-red-600 text-sm font-medium">Out of Stock</span>
             )}
@@ -116,9 +135,9 @@ export default function ProductDetailPage() {
             <div className="flex items-center border rounded-lg">
               <button onClick={() => setQuantity(Math.max(1, quantity - 1))} className="px-3 py-2 hover:bg-gray-100"><Minus className="w-4 h-4" /></button>
               <span className="px-4 py-2 font-medium">{quantity}</span>
-              <button onClick={() => setQuantity(Math.min(product.stock, quantity + 1))} className="px-3 py-2 hover:bg-gray-100"><Plus className="w-4 h-4" /></button>
+              <button onClick={() => setQuantity(Math.min(available ?? product.stock, quantity + 1))} className="px-3 py-2 hover:bg-gray-100"><Plus className="w-4 h-4" /></button>
             </div>
-            <button onClick={handleAddToCart} disabled={product.stock <= 0} className="btn-primary flex items-center gap-2 flex-1">
+            <button onClick={handleAddToCart} disabled={product.stock_status === 'out_of_stock'} className="btn-primary flex items-center gap-2 flex-1">
               <ShoppingCart className="w-5 h-5" /> Add to Cart
             </button>
           </div>
@@ -135,7 +154,7 @@ export default function ProductDetailPage() {
       <div className="border-b mb-6">
         <div className="flex gap-8">
           {['description', 'reviews'].map(t => (
-            <button key={t} onClick={() => setTab(t)} className={`pb-3 text-sm font-medium capitalize border-b-2 transition-colors ${tab === t ? 'border-primary-600 text-primary-600' : 'border-transparent text-gray-500 hover:text-gray-700'}`}>{t} {t === 'reviews' ? `(${reviews.length})` : ''}</button>
+            <button key={t} onClick={() => setTab(t)} className={`pb-3 text-sm font-medium capitalize border-b-2 transition-colors ${tab === t ? 'border-primary-600 text-primary-600' : 'border-transparent text-gray-500 hover:text-gray-700'}`}>{t} {t === 'reviews' ? `(${product.rating_count})` : ''}</button>
           ))}
         </div>
       </div>
@@ -159,6 +178,9 @@ export default function ProductDetailPage() {
               <p className="text-gray-600 text-sm">{r.comment}</p>
             </div>
           ))}
+          {reviewPage.page < reviewPage.total_pages && (
+            <button onClick={loadMoreReviews} className="btn-secondary text-sm mt-4">Load more reviews</button>
+          )}
 
           {user && (
             <form onSubmit={handleReview} className="mt-8 card p-6">
@@ -178,6 +200,15 @@ export default function ProductDetailPage() {
           )}
         </div>
       )}
+
+      {boughtTogether.length > 0 && (
+        <div className="mt-12">
+          <h2 className="text-xl font-bold text-gray-900 mb-6">Frequently Bought Together</h2>
+          <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-6">
+            {boughtTogether.slice(0, 4).map(p => <ProductCard key={p.id} product={p} />)}
+          </div>
+        </div>
+      )}
     </div>
   );
 }
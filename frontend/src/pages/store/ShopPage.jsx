@@ -10,6 +10,7 @@ export default function ShopPage() {
   const [products, setProducts] = useState([]);
   const [categories, setCategories] = useState([]);
   const [total, setTotal] = useState(0);
+  const [totalExact, setTotalExact] = useState(true);
   const [totalPages, setTotalPages] = useState(0);
   const [loading, setLoading] = useState(true);
   const [filtersOpen, setFiltersOpen] = useState(false);
@@ -25,7 +26,7 @@ export default function ShopPage() {
 
   useEffect(() => {
     setLoading(true);
-    const params = { page, page_size: 12, sort };
+    const params = { page, page_size: 12, sort, view: 'compact' };
     if (category) params.category = category;
     if (search) params.search = search;
     if (minPrice) params.min_price = minPrice;
@@ -34,6 +35,7 @@ export default function ShopPage() {
     productsAPI.list(params).then(r => {
       setProducts(r.data.products);
       setTotal(r.data.total);
+      setTotalExact(r.data.total_exact);
       setTotalPages(r.data.total_pages);
     }).finally(() => setLoading(false));
   }, [page, category, search, sort, minPrice, maxPrice]);
@@ -49,13 +51,14 @@ export default function ShopPage() {
 
   return (
     <div className="max-w-7xl mx-auto px-4 py-8">
-      <PageHeader title={search ? `Search: "${search}"` : category ? categories.find(c => c.slug === category)?.name || 'Products' : 'All Products'} subtitle={`${total} products found`}>
+      <PageHeader title={search ? `Search: "${search}"` : category ? categories.find(c => c.slug === category)?.name || 'Products' : 'All Products'} subtitle={`${totalExact ? '' : 'About '}${total} products found`}>
         <div className="flex items-center gap-3">
           <select value={sort} onChange={e => updateParam('sort', e.target.value)} className="input-field !w-auto text-sm">
             <option value="newest">Newest First</option>
             <option value="price_asc">Price: Low to High</option>
             <option value="price_desc">Price: High to Low</option>
             <option value="name">Name A-Z</option>
+            <option value="rating">Top Rated</option>
           </select>
           <button onClick={() => setFiltersOpen(!filtersOpen)} className="md:hidden btn-secondary text-sm flex items-center gap-1">
             <SlidersHorizontal className="w-4 h-4" /> Filters
@@ -7,7 +7,8 @@ export default defineConfig({
     port: 5173,
     proxy: {
       '/api': 'http://localhost:8000',
-      '/uploads': 'http://localhost:8000'
+      '/uploads': 'http://localhost:8000',
+      '^/sitemap[^/]*\\.xml$': 'http://localhost:8000'
     }
   }
 })